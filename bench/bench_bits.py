@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+micro benchmarks of the Bits primitive against its previous implementation
+
+    python3 -m bench.bench_bits
+"""
+import timeit
+import bitarray
+from obm.datastruct import Bits
+from obm.utils import ceil8
+
+WIDTHS = (1, 3, 8, 13, 16, 20, 32, 48, 64)
+NUMBER = 20000
+
+
+class LegacyBits(bitarray.bitarray):
+    """Bits as it was before the int/bool/hash rework, for comparison"""
+
+    def __init__(self, initial=None, clean=True, **kwargs):
+        super().__init__()
+        if clean and isinstance(initial, int):
+            self.setall(0)
+
+    def __bytes__(self):
+        return self.tobytes()
+
+    def __int__(self):
+        delta = ceil8(len(self)) - len(self)
+        bits = LegacyBits(delta) + self if delta else self
+        return int.from_bytes(bytes(bits), "big")
+
+    def __bool__(self):
+        return all(self.tolist())
+
+    @classmethod
+    def fromint(cls, value, length):
+        return cls.frombytes(value.to_bytes((length + 7) // 8, "big"))[-length:]
+
+    @classmethod
+    def frombytes(cls, value):
+        c = cls()
+        super(cls, c).frombytes(value)
+        return c
+
+    def __hash__(self):
+        return hash((len(self), bytes(self)))
+
+
+def _time(func):
+    return min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER * 1e9
+
+
+def bench_width(width):
+    """:return: dict of operation -> (legacy ns, current ns)"""
+    value = (1 << width) - 1 - (width > 1)
+    legacy = LegacyBits.fromint(value, width)
+    current = Bits.fromint(value, width)
+    assert int(legacy) == int(current) == value
+    return {
+        "int": (_time(lambda: int(legacy)), _time(lambda: int(current))),
+        "fromint": (_time(lambda: LegacyBits.fromint(value, width)),
+                    _time(lambda: Bits.fromint(value, width))),
+        "bool": (_time(lambda: bool(legacy)), _time(lambda: bool(current))),
+        "hash": (_time(lambda: hash(legacy)), _time(lambda: hash(current))),
+        "new": (_time(lambda: LegacyBits(width)), _time(lambda: Bits(width))),
+    }
+
+
+def main():
+    print("{:>5} {:>8} {:>12} {:>12} {:>8}".format("width", "op", "legacy ns", "current ns", "speedup"))
+    for width in WIDTHS:
+        for op, (old, new) in bench_width(width).items():
+            print("{:>5} {:>8} {:>12.0f} {:>12.0f} {:>7.2f}x".format(width, op, old, new, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+benchmarks of the example Ethernet/IP/TCP stack, run from the repo root:
+
+    python3 -m bench.run                      # print results
+    python3 -m bench.run --save               # store them as the baseline
+    python3 -m bench.run --compare            # compare with the baseline,
+                                              #   exit 1 on regression
+
+every case reports packets (operations) per second and the peak memory
+    allocated by one operation, measured with tracemalloc
+
+the stored baseline is machine specific, save your own before comparing
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import tracemalloc
+
+from obm.datastruct import Bits
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+PAYLOAD_SIZES = (0, 512, 1460, 9000)
+
+OPTION_SETS = {
+    "none": [],
+    "syn": [
+        TCP.OptionMaxSegmentSize(value=1460), b"\x01",
+        TCP.OptionWindowScale(value=8), b"\x01", b"\x01",
+        TCP.OptionSelectiveAckPermitted(),
+    ],
+    "ts_sack": [
+        b"\x01", b"\x01", TCP.OptionTimestamp(value=0x00773265026b7a2b),
+        b"\x01", b"\x01", TCP.OptionSACK(length=18, value=Bits(128)),
+    ],
+}
+
+
+def build_frame(payload_size, options):
+    """:return: raw bytes of a Ethernet/IP/TCP frame"""
+    options_length = sum(len(Bits.frombytes(o)) if isinstance(o, bytes) else len(o) for o in options) // 8
+    data_offset = 5 + (options_length + 3) // 4
+    options = options + [b"\x00"] * ((data_offset - 5) * 4 - options_length)
+
+    tcp = TCP(src_port=46858, dst_port=80, seq_number=0xee3bd3cb, data_offset=data_offset,
+              ack=1, psh=1, window_size=8192, options=options,
+              payload=Bits.frombytes(b"x" * payload_size))
+    ip = IP(total_length=20 + len(bytes(tcp)), identification=0x4712, flags="010",
+            ttl=64, protocol=6, src_ip=0xc0a88501, dst_ip=0xc0a88580, payload=tcp)
+    tcp.parent = ip
+    tcp.fill_checksum()
+    ip.fill_checksum()
+    ethernet = Ethernet(dst_mac=bytes.fromhex("000c29ba6742"), src_mac=bytes.fromhex("005056c00008"),
+                        type=0x0800, payload=ip)
+    return bytes(ethernet)
+
+
+def make_cases(raw):
+    """:return: dict of case name -> callable running one operation"""
+    ethernet = Ethernet.frombytes(raw)
+    ip = ethernet.payload
+    tcp = ip.payload
+
+    def get_fields():
+        return ip.src_ip, ip.dst_ip, ip.protocol, tcp.src_port, tcp.dst_port
+
+    def set_fields():
+        ip.ttl = 63
+        tcp.dst_port = 8080
+
+    def checksum():
+        tcp.fill_checksum()
+        ip.fill_checksum()
+
+    return {
+        "decode": lambda: Ethernet.frombytes(raw),
+        "decode_lazy_5tuple": lambda: Ethernet.frombytes(raw, lazy=True).payload.payload.dst_port,
+        "encode": lambda: bytes(ethernet),
+        "get": get_fields,
+        "set": set_fields,
+        "options": lambda: tcp.options,
+        "checksum": checksum,
+    }
+
+
+def measure(func, min_time=0.1):
+    """:return: (operations per second, peak bytes allocated by one operation)"""
+    timer = timeit.Timer(func)
+    once = timer.timeit(number=10) / 10 or 1e-9
+    number = max(1, int(min_time / once))
+    best = min(timer.repeat(repeat=5, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        func()  # warm up caches
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            # python < 3.9, restarting clears the peak
+            tracemalloc.stop()
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return 1 / best, peak
+
+
+def run(payload_sizes=PAYLOAD_SIZES, option_sets=OPTION_SETS, min_time=0.1, verbose=True):
+    """:return: dict of "case/payload_size/options" -> {"pps":..., "peak_bytes":...}"""
+    results = {}
+    for options_name, options in option_sets.items():
+        for payload_size in payload_sizes:
+            raw = build_frame(payload_size, list(options))
+            for case, func in make_cases(raw).items():
+                key = "{}/{}/{}".format(case, payload_size, options_name)
+                pps, peak = measure(func, min_time)
+                results[key] = {"pps": round(pps, 1), "peak_bytes": peak}
+                if verbose:
+                    print("{:<36} {:>12,.0f} pps {:>10,} B".format(key, pps, peak))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """:return: list of regressed keys, slower than baseline by more than `threshold`"""
+    regressions = []
+    print("{:<36} {:>12} {:>12} {:>8}".format("case", "baseline", "current", "ratio"))
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = result["pps"] / baseline[key]["pps"]
+        flag = ""
+        if ratio < 1 - threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print("{:<36} {:>12,.0f} {:>12,.0f} {:>7.2f}x{}".format(
+            key, baseline[key]["pps"], result["pps"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="store the results as baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="compare the results with a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="tolerated slowdown before reporting a regression (default 0.2)")
+    parser.add_argument("--quick", action="store_true",
+                        help="shorter runs, only the smallest and largest payloads")
+    args = parser.parse_args(argv)
+
+    payload_sizes = (PAYLOAD_SIZES[0], PAYLOAD_SIZES[-1]) if args.quick else PAYLOAD_SIZES
+    results = run(payload_sizes, min_time=0.02 if args.quick else 0.1, verbose=not args.compare)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print("baseline saved to", args.save)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("{} case(s) regressed by more than {:.0%}".format(len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,9 +9,8 @@ class Ethernet(Model):
     src_mac = BytesField(48)
     type = IntField(16)
 
-    def payload_type(self):
-        if self.type == 0x0800:
-            # TODO: add more protocols
-            return IP
-        else:
-            return None
+    payload_key = "type"
+    payload_types = {
+        0x0800: IP,
+        # TODO: add more protocols
+    }
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # coding=utf-8
-from obm import Model, IntField, BitsField
-from obm.utils import one_complement_checksum
+from obm import Model, IntField, BitsField, ChecksumField
 
 from example.tcp import TCP
 
@@ -22,7 +21,7 @@ class IP(Model):
     ttl = IntField(8)
     protocol = IntField(8)
 
-    checksum = IntField(16)
+    checksum = ChecksumField()
 
     src_ip = IntField(32)
     dst_ip = IntField(32)
@@ -30,15 +29,13 @@ class IP(Model):
     options = BitsField(lambda self: max(0, (self.ihl - 5) * 32))
 
     def fill_checksum(self):
-        self.checksum = 0
-        self.checksum = one_complement_checksum(bytes(self.solid_data))
-
-    def payload_type(self):
-        if self.protocol == 0x06:
-            return TCP
-        else:
-            # TODO: add more
-            return None
+        self.fields["checksum"].fill(self)
+
+    payload_key = "protocol"
+    payload_types = {
+        0x06: TCP,
+        # TODO: add more
+    }
 
 
 def send_ipv4():
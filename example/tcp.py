@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # coding=utf-8
-from obm import Model, IntField, BitsField, PrefixedOptionsField
-from obm.utils import one_complement_checksum
+from obm import Model, IntField, BitsField, PrefixedOptionsField, ChecksumField
 
 
 class TCP(Model):
@@ -24,7 +23,8 @@ class TCP(Model):
     fin = IntField(1)
 
     window_size = IntField(16)
-    checksum = IntField(16)
+    checksum = ChecksumField(ChecksumField.PACKAGE, pseudo_header=lambda self: self.pseudo_header(),
+                             pseudo_fields=("src_ip", "dst_ip"))
     urgent_pointer = IntField(16)
 
     class OptionMaxSegmentSize(Model):
@@ -64,12 +64,14 @@ class TCP(Model):
         }
     )
 
-    def fill_checksum(self):
-        self.checksum = 0
+    def pseudo_header(self):
         ip = self.parent
-        placebo_head = ip.src_ip.to_bytes(4, "big") + \
-                       ip.dst_ip.to_bytes(4, "big") + \
-                       b'\x00\x06' + \
-                       len(bytes(self)).to_bytes(2, "big")
+        if ip is None:
+            return None
+        return ip.src_ip.to_bytes(4, "big") + \
+               ip.dst_ip.to_bytes(4, "big") + \
+               b'\x00\x06' + \
+               (len(self) // 8).to_bytes(2, "big")
 
-        self.checksum = one_complement_checksum(placebo_head + bytes(self))
+    def fill_checksum(self):
+        self.fields["checksum"].fill(self)
@@ -2,4 +2,4 @@
 # coding=utf-8
 from .model import Model
 from .fields import IntField, BytesField, BitsField
-from .fields_extended import PrefixedOptionsField
+from .fields_extended import PrefixedOptionsField, TLVField, ChecksumField
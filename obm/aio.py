@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+asyncio integration: binary protocols whose messages are models
+
+as in `obm.stream`, a message is the solid part plus the variable part
+    of a model, its length is given by the model itself, e.g.:
+
+    class Message(Model):
+        length = IntField(16)
+        body = BytesField(lambda self: self.length * 8)
+"""
+import asyncio
+from .stream import StreamDecoder
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# free space offered to the transport at least, to avoid tiny reads
+MIN_READ_SIZE = 4096
+
+
+class ModelProtocol(asyncio.BufferedProtocol):
+    """
+    frames messages of `model` out of a byte stream
+
+    >>> class Server(ModelProtocol):
+    ...     def __init__(self):
+    ...         super().__init__(Message)
+    ...
+    ...     def message_received(self, message):
+    ...         self.send(Message(length=2, body=b"ok"))
+    >>> server = await loop.create_server(Server, port=8000)
+
+    the transport reads straight into the receive buffer of the protocol,
+        messages are decoded from it without copying it first.
+        a message whose header is invalid (see `StreamDecoder.record_size`)
+        raises ValueError, which makes asyncio close the connection.
+
+    writes are batched by `send()`, and `drain()` waits while the
+        transport asks to pause writing.
+    """
+
+    def __init__(self, model, on_message=None, lazy=False, max_record_size=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        :type model: type[obm.model_base.PackageBase]
+        :param on_message: callable(message), called by the default `message_received`
+        :param buffer_size: initial size of the receive buffer, it grows
+            to hold the largest message
+        """
+        self.model = model
+        self.on_message = on_message
+        self.lazy = lazy
+        self.transport = None
+        self._decoder = StreamDecoder(model, lazy=lazy, max_record_size=max_record_size)
+        self._buffer = bytearray(buffer_size)
+        self._start = 0  # first byte not decoded yet
+        self._end = 0  # end of the received data
+        self._next_size = None
+        self._paused = False
+        self._drain_waiters = []
+        self._connection_lost = False
+        self._exception = None
+
+    @property
+    def pending(self) -> int:
+        """number of received bytes not yet decoded"""
+        return self._end - self._start
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self._connection_lost = True
+        self._exception = exc
+        self._wake_drain_waiters()
+
+    def get_buffer(self, sizehint):
+        buff = self._buffer
+        pending = self._end - self._start
+        wanted = max(sizehint, MIN_READ_SIZE, (self._next_size or 0) - pending)
+        if len(buff) - self._end < wanted:
+            if len(buff) - pending >= wanted:
+                buff[:pending] = buff[self._start:self._end]
+            else:
+                # the transport may still hold a view of the old buffer,
+                #   so a new one is made instead of resizing it
+                self._buffer = bytearray(max(2 * len(buff), pending + wanted))
+                self._buffer[:pending] = buff[self._start:self._end]
+            self._start, self._end = 0, pending
+        return memoryview(self._buffer)[self._end:]
+
+    def buffer_updated(self, nbytes):
+        self._end += nbytes
+        view = memoryview(self._buffer)[:self._end]
+        decoder = self._decoder
+        while True:
+            size = self._next_size
+            if size is None:
+                size = self._next_size = decoder.record_size(view, self._start)
+                if size is None:
+                    break
+            if self._end - self._start < size:
+                break
+            # the message only keeps copies of its header,
+            #   so the buffer can be overwritten once it is decoded
+            message = self.model.frombuffer(view, self._start * 8, drop_payload=True, lazy=self.lazy)
+            self._start += size
+            self._next_size = None
+            self.message_received(message)
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def eof_received(self):
+        if self._start != self._end:
+            raise ValueError("truncated {} message, {} bytes left".format(
+                self.model.__name__, self._end - self._start))
+
+    def message_received(self, message):
+        """called with each decoded message, override it or give `on_message`"""
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def send(self, *messages):
+        """encode `messages` and write them at once"""
+        if len(messages) == 1:
+            self.transport.write(bytes(messages[0]))
+        else:
+            self.transport.write(b"".join(bytes(message) for message in messages))
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._wake_drain_waiters()
+
+    def _wake_drain_waiters(self):
+        waiters, self._drain_waiters = self._drain_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def drain(self):
+        """wait until the transport accepts more data to write"""
+        if self._connection_lost:
+            raise ConnectionResetError("connection lost") from self._exception
+        if not self._paused:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._drain_waiters.append(waiter)
+        await waiter
+        if self._connection_lost:
+            raise ConnectionResetError("connection lost") from self._exception
+
+
+async def read_model(reader, model, max_record_size=None, lazy=False):
+    """
+    read one message of `model` from an asyncio.StreamReader
+
+    :return: the message, or None at the end of the stream
+    :raises ValueError: if the stream ends inside a message
+    """
+    decoder = StreamDecoder(model, lazy=lazy, max_record_size=max_record_size)
+    try:
+        data = await reader.readexactly((model.solid_length + 7) // 8)
+        size = decoder.record_size(data)
+        if size is None:
+            raise ValueError("{} can not be framed from its solid part".format(model.__name__))
+        if size > len(data):
+            data += await reader.readexactly(size - len(data))
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ValueError("truncated {} message, {} bytes left".format(model.__name__, len(e.partial)))
+    return model.frombuffer(data, drop_payload=True, lazy=lazy)
+
+
+async def iter_models(reader, model, max_record_size=None, lazy=False):
+    """async generator of the messages of `model` read from an asyncio.StreamReader"""
+    while True:
+        message = await read_model(reader, model, max_record_size, lazy)
+        if message is None:
+            return
+        yield message
+
+
+async def write_models(writer, messages):
+    """
+    write `messages` to an asyncio.StreamWriter in one go,
+        then wait for its buffer to drain
+    """
+    writer.write(b"".join(bytes(message) for message in messages))
+    await writer.drain()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+columnar encoding/decoding of many packages of the same model at once
+
+numpy is required by this module, but not by the rest of obm
+"""
+import collections
+from .consts import *
+from .fields_base import FieldBase
+from .utils import _import_numpy
+
+
+def _uint_dtype(np, length):
+    for bits, dtype in ((8, np.uint8), (16, np.uint16), (32, np.uint32)):
+        if length <= bits:
+            return dtype
+    return np.uint64
+
+
+def as_records(records, record_size=None):
+    """
+    view `records` as a 2-D uint8 array, one row per record
+
+    :param records: 2-D uint8 array, 1-D array of fixed-size records
+        (e.g. a structured or void dtype), or a flat uint8 array/buffer
+        together with `record_size` (in bytes)
+    """
+    np = _import_numpy()
+    if not isinstance(records, np.ndarray):
+        records = np.frombuffer(records, dtype=np.uint8)
+    if record_size is not None:
+        return np.ascontiguousarray(records).view(np.uint8).reshape(-1, record_size)
+    if records.ndim == 2 and records.dtype == np.uint8:
+        return records
+    if records.ndim == 1 and records.dtype != np.uint8:
+        return np.ascontiguousarray(records).view(np.uint8).reshape(len(records), -1)
+    raise ValueError("unable to split {!r} into records, please specify record_size".format(records))
+
+
+def decode_array(model, records, record_size=None):
+    """
+    decode the solid fields of fixed-size records, each record starting
+        with the solid part of `model`
+
+    int-like fields spanning at most 8 bytes become unsigned int arrays
+        (raw bits for non-IntField fields such as BitsField),
+        byte-aligned BytesField become (N, nbytes) uint8 arrays,
+        anything else, including IntField subclasses which changed
+        the conversions, falls back to an object array of python values.
+
+    :type model: type[obm.model_base.PackageBase]
+    :return: OrderedDict of field name -> numpy array
+    """
+    np = _import_numpy()
+    records = as_records(records, record_size)
+    header_size = model._codec.byte_length
+    if records.shape[1] < header_size:
+        raise ValueError("record size {} is smaller than the solid part of {} ({} bytes)".format(
+            records.shape[1], model.__name__, header_size))
+
+    columns = collections.OrderedDict()
+    for fname, field in model.solid_fields.items():  # type: str,FieldBase
+        start, end = field._byte_start, field._byte_end
+        code = field.struct_code()
+        # the raw value of an IntField isn't its value if a subclass changed the conversions
+        convert = field.raw_is_py and not field.converts_raw()
+        if not convert and code is not None and code.endswith("s"):
+            columns[fname] = records[:, start:end]
+        elif not convert and end - start <= 8:
+            acc = np.zeros(len(records), dtype=np.uint64)
+            for i in range(start, end):
+                acc <<= np.uint64(8)
+                acc |= records[:, i]
+            shift = end * 8 - field.offset - field.length
+            if shift:
+                acc >>= np.uint64(shift)
+            if field.length < 64:
+                acc &= np.uint64((1 << field.length) - 1)
+            columns[fname] = acc.astype(_uint_dtype(np, field.length))
+        else:
+            shift = end * 8 - field.offset - field.length
+            mask = (1 << field.length) - 1
+            int2py = FieldBase.int2py.__get__(field) if convert else field.int2py
+            columns[fname] = np.array([
+                int2py(int.from_bytes(row[start:end].tobytes(), BYTE_ORDER) >> shift & mask)
+                for row in records
+            ], dtype=object)
+    return columns
+
+
+def decode_many(model, buffers):
+    """
+    decode the solid fields of many buffers, each starting with
+        the solid part of `model`, see `decode_array`
+    """
+    np = _import_numpy()
+    header_size = model._codec.byte_length
+    headers = []
+    for buff in buffers:
+        header = bytes(memoryview(buff)[:header_size])
+        if len(header) < header_size:
+            raise ValueError("buffer is shorter than the solid part of {} ({} bytes)".format(
+                model.__name__, header_size))
+        headers.append(header)
+    records = np.frombuffer(b"".join(headers), dtype=np.uint8)
+    return decode_array(model, records.reshape(-1, header_size))
+
+
+def _column(np, field, values, count):
+    """`values` of a int-like field as an uint64 array of `count` raw values"""
+    exact = field.converts_raw()
+    py2int = field.py2int if exact else FieldBase.py2int.__get__(field)
+    if exact and isinstance(values, np.ndarray) and values.dtype.kind in "ui":
+        column = values.astype(np.uint64)
+    elif isinstance(values, (list, tuple)) or isinstance(values, np.ndarray):
+        if isinstance(values, np.ndarray):
+            # python values for the conversions
+            values = values.tolist()
+        column = np.array([py2int(v) for v in values], dtype=np.uint64)
+    else:
+        return np.full(count, py2int(values), dtype=np.uint64)
+    if len(column) != count:
+        raise ValueError("length of column `{}` is {}, expecting {}".format(
+            field.attr_name, len(column), count))
+    return column
+
+
+def encode_many(model, count=None, **columns):
+    """
+    encode `count` packages of a fixed-layout model (without variable fields)
+        into one contiguous buffer, without creating model instances
+
+    every keyword is a column: a list/array with one value per package,
+        or a scalar shared by all packages. missing fields use their default.
+        byte-aligned BytesField columns may also be (N, nbytes) uint8 arrays.
+        values of fields whose subclass changed the conversions are
+        converted one at a time, like in the constructor.
+
+    :type model: type[obm.model_base.PackageBase]
+    :param count: number of packages, inferred from the columns if omitted
+    :rtype: bytearray
+    """
+    np = _import_numpy()
+    if model.variable_fields:
+        raise ValueError("{} has variable fields, only fixed-layout models can be batch encoded".format(
+            model.__name__))
+    unknown = set(columns) - set(model.solid_fields)
+    if unknown:
+        raise ValueError("unknown fields: {}".format(", ".join(sorted(unknown))))
+
+    if count is None:
+        lengths = {len(v) for v in columns.values()
+                   if isinstance(v, (list, tuple, np.ndarray))}
+        if len(lengths) != 1:
+            raise ValueError("unable to infer count from the columns, please specify it")
+        count = lengths.pop()
+
+    records = np.zeros((count, model._codec.byte_length), dtype=np.uint8)
+    for fname, field in model.solid_fields.items():  # type: str,FieldBase
+        values = columns.get(fname, field.default)
+        start, end = field._byte_start, field._byte_end
+        code = field.struct_code()
+        exact = field.converts_raw()
+        if exact and code is not None and code.endswith("s"):
+            size = end - start
+            if isinstance(values, np.ndarray) and values.ndim == 2:
+                records[:, start:end] = values
+            elif isinstance(values, (list, tuple, np.ndarray)):
+                records[:, start:end] = np.frombuffer(b"".join(
+                    (v or b"").ljust(size, b"\x00")[:size] for v in values
+                ), dtype=np.uint8).reshape(-1, size)
+            else:
+                records[:, start:end] = np.frombuffer(
+                    (values or b"").ljust(size, b"\x00")[:size], dtype=np.uint8)
+            continue
+
+        shift = end * 8 - field.offset - field.length
+        mask = (1 << field.length) - 1
+        if end - start <= 8:
+            column = _column(np, field, values, count)
+            if field.length < 64:
+                column &= np.uint64(mask)
+            column <<= np.uint64(shift)
+            for i in range(start, end):
+                records[:, i] |= (column >> np.uint64(8 * (end - 1 - i))).astype(np.uint8)
+        else:
+            if not isinstance(values, (list, tuple, np.ndarray)):
+                values = [values] * count
+            py2int = field.py2int if exact else FieldBase.py2int.__get__(field)
+            for row, value in zip(records, values):
+                raw = (py2int(value) & mask) << shift
+                row[start:end] |= np.frombuffer(raw.to_bytes(end - start, BYTE_ORDER), dtype=np.uint8)
+
+    return bytearray(records)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import struct
+from .consts import *
+from .fields_base import FieldBase
+
+
+class SolidCodec:
+    """
+    Specialized decoder/encoder for the solid fields of one model,
+    generated once by MetaPackage at class-creation time.
+
+    `decode(buff, offset=0)` returns the python values of all solid fields
+    (in `solid_fields` order) read from `buff` starting at byte `offset`,
+    `encode(values)` packs such a sequence back into bytes.
+
+    When every solid field is byte-aligned and representable by struct,
+    a struct.Struct is used; otherwise one shift-and-mask expression
+    per field is evaluated over a single int.from_bytes of the header.
+
+    Fields whose `int2py`/`py2int` don't stand for their conversions
+    (see FieldBase.converts_raw) go through the generic ones of FieldBase,
+    which call `bits2py`/`py2bits`; `inexact` lists them, for the
+    constructor to set them with their setter instead.
+    """
+
+    def __init__(self, solid_fields, solid_length):
+        self.fields = list(solid_fields.values())
+        self.solid_length = solid_length
+        self.byte_length = (solid_length + 7) // 8
+        # (index, field) of the fields without conversion shortcuts
+        self.inexact = [(i, field) for i, field in enumerate(self.fields) if not field.converts_raw()]
+
+        self.struct = self._build_struct()
+        # also checks the values and raises the errors of the struct path
+        self._decode, self._encode = self._build_shift_mask()
+        if self.struct is not None:
+            self.decode = self._struct_decode
+            self.encode = self._struct_encode
+        else:
+            self.decode, self.encode = self._decode, self._encode
+
+    def _build_struct(self):
+        if self.solid_length % 8:
+            return None
+        fmt = []
+        for field in self.fields:
+            if field.struct_accessor() is None:
+                return None
+            fmt.append(field.struct_code())
+        # falsy values (None, 0 as default of BytesField...) are packed as zero
+        self._struct_zeros = [b"" if code.endswith("s") else 0 for code in fmt]
+        # bytes of the wrong size would be padded or truncated
+        self._struct_sized = [(i, field) for i, (field, code) in enumerate(zip(self.fields, fmt))
+                              if code.endswith("s")]
+        return struct.Struct((">" if BYTE_ORDER == "big" else "<") + "".join(fmt))
+
+    def _struct_decode(self, buff, offset=0):
+        return self.struct.unpack_from(buff, offset)
+
+    def _struct_encode(self, values):
+        for i, field in self._struct_sized:
+            field._check_size(values[i])
+        try:
+            return self.struct.pack(*(
+                v if v else zero for v, zero in zip(values, self._struct_zeros)
+            ))
+        except struct.error:
+            # out of range or of a wrong type, raise what the setters raise
+            return self._encode(values)
+
+    def _build_shift_mask(self):
+        total_bits = self.byte_length * 8
+        namespace = {"fields": self.fields}
+        decode_items = []
+        encode_items = []
+        for i, field in enumerate(self.fields):
+            shift = total_bits - field.offset - field.length
+            mask = (1 << field.length) - 1
+            exact = field.converts_raw()
+            namespace["f%d" % i] = field
+            namespace["int2py%d" % i] = field.int2py if exact else FieldBase.int2py.__get__(field)
+            namespace["py2int%d" % i] = field.py2int if exact else FieldBase.py2int.__get__(field)
+            raw = "(v >> %d) & %d" % (shift, mask) if shift else "v & %d" % mask
+            if field.raw_is_py and exact:
+                decode_items.append(raw)
+            else:
+                decode_items.append("int2py%d(%s)" % (i, raw))
+            encode_items.append(
+                "    r = py2int%d(values[%d])\n"
+                "    if not 0 <= r <= %d:\n"
+                "        overflow(f%d, r)\n"
+                "    v |= r << %d\n" % (i, i, mask, i, shift)
+            )
+        namespace["overflow"] = _overflow
+
+        src = (
+            "def decode(buff, offset=0):\n"
+            "    v = int.from_bytes(buff[offset:offset + {n}], {order!r})\n"
+            "    return ({decode})\n"
+            "\n"
+            "def encode(values):\n"
+            "    v = 0\n"
+            "{encode}"
+            "    return v.to_bytes({n}, {order!r})\n"
+        ).format(
+            n=self.byte_length,
+            order=BYTE_ORDER,
+            decode="".join(item + ", " for item in decode_items),
+            encode="".join(encode_items),
+        )
+        exec(src, namespace)
+        return namespace["decode"], namespace["encode"]
+
+
+def _overflow(field, raw):
+    raise OverflowError("{} does not fit in {} bits: {}".format(field.attr_name, field.length, raw))
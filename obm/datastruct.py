@@ -6,14 +6,23 @@ from .consts import *
 from .utils import *
 
 
+# bitarray 3+ zero-fills `bitarray(length)` by itself
+_NATIVE_ZERO_INIT = int(bitarray.__version__.split(".")[0]) >= 3
+
+_bitarray_frombytes = bitarray.bitarray.frombytes
+
+
 class Bits(bitarray.bitarray):
+    __slots__ = ()
+
     DEFAULT_BYTE_ORDER = BYTE_ORDER
 
-    def __init__(self, initial=None, clean=True, **kwargs):
-        super().__init__()
+    if not _NATIVE_ZERO_INIT:
+        def __init__(self, initial=None, clean=True, **kwargs):
+            super().__init__()
 
-        if clean and isinstance(initial, int):
-            self.setall(0)
+            if clean and isinstance(initial, int):
+                self.setall(0)
 
     # def __init__(self, *args, byte_order=DEFAULT_BYTE_ORDER, **kwargs):
 
@@ -22,26 +31,48 @@ class Bits(bitarray.bitarray):
         return self.tobytes()
 
     def __int__(self) -> int:
-        delta = ceil8(len(self)) - len(self)
-        if delta:
-            bits = Bits(delta) + self
-        else:
-            bits = self
-        return int.from_bytes(bytes(bits), BYTE_ORDER)
+        # tobytes() pads the last byte with trailing zeros, shift them out
+        return int.from_bytes(self.tobytes(), BYTE_ORDER) >> (-len(self) % 8)
 
     def __bool__(self) -> bool:
-        return all(self.tolist())
+        return self.all()
 
     @classmethod
     def fromint(cls, value: int, length: int, byte_order=DEFAULT_BYTE_ORDER):
-        return cls.frombytes(value.to_bytes((length + 7) // 8, byte_order))[-length:]
+        c = cls()
+        _bitarray_frombytes(c, value.to_bytes((length + 7) // 8, byte_order))
+        head = len(c) - length
+        if head:
+            del c[:head]
+        return c
 
     @classmethod
     def frombytes(cls, value: bytes, byte_order=DEFAULT_BYTE_ORDER):
         c = cls()
-        super(cls, c).frombytes(value)
+        _bitarray_frombytes(c, value)
         return c  # type:Bits
 
+    @classmethod
+    def frombuffer(cls, buffer):
+        """
+        wrap a buffer (bytes, bytearray, memoryview, mmap...) without copying,
+            the result is read-only if the buffer is
+        """
+        if isinstance(buffer, bitarray.bitarray):
+            return buffer
+        return cls(buffer=memoryview(buffer).cast("B"))
+
+    def window(self, start, end=None):
+        """
+        bits from `start` to `end` (default: the end), sharing memory
+            with self when both ends are byte-aligned, otherwise a copy
+        """
+        if end is None:
+            end = len(self)
+        if not start % 8 and not end % 8:
+            return Bits(buffer=memoryview(self)[start // 8:end // 8])
+        return self[start:end]
+
     def tobits(self):
         return self
 
@@ -63,7 +94,23 @@ class Bits(bitarray.bitarray):
             return Bits(delta) + self
 
     def __hash__(self):
-        return hash((len(self), bytes(self)))
+        return hash((len(self), self.tobytes()))
 
     def hex(self):
-        return bytes(self).hex()
+        return self.tobytes().hex()
+
+
+class FrozenBits(Bits):
+    """
+    immutable Bits, its hash is computed once, use it for dict keys
+    """
+    __slots__ = ("_hash",)
+
+    def __init__(self, *args, **kwargs):
+        if not _NATIVE_ZERO_INIT:
+            super().__init__(*args, **kwargs)
+        self._freeze()
+        self._hash = hash((len(self), self.tobytes()))
+
+    def __hash__(self):
+        return self._hash
@@ -1,16 +1,33 @@
 #!/usr/bin/env python3
 # coding=utf-8
+from .consts import *
+from .utils import ceil8
 from .datastruct import Bits
 from .fields_base import FieldBase
 
+_STRUCT_INT_CODES = {8: "B", 16: "H", 32: "I", 64: "Q"}
+
 
 class IntField(FieldBase):
+    raw_is_py = True
+
     def bits2py(self, bits: Bits) -> int:
         return int(bits)
 
     def py2bits(self, value: int, length: int, **kwargs) -> Bits:
         return Bits.fromint(value, length)
 
+    def int2py(self, raw: int) -> int:
+        return raw
+
+    def py2int(self, value: int) -> int:
+        return 0 if value is None else value
+
+    def struct_code(self):
+        if self._byte_aligned:
+            return _STRUCT_INT_CODES.get(self.length)
+        return None
+
 
 class BytesField(FieldBase):
     def bits2py(self, bits: Bits) -> bytes:
@@ -19,6 +36,32 @@ class BytesField(FieldBase):
     def py2bits(self, value: bytes, length: int, **kwargs) -> Bits:
         return Bits.frombytes(value)
 
+    def int2py(self, raw: int) -> bytes:
+        pad = ceil8(self.length) - self.length
+        return (raw << pad).to_bytes(ceil8(self.length) // 8, BYTE_ORDER)
+
+    def py2int(self, value: bytes) -> int:
+        if not value:
+            return 0
+        self._check_size(value)
+        pad = len(value) * 8 - self.length
+        return int.from_bytes(value, BYTE_ORDER) >> pad if pad >= 0 \
+            else int.from_bytes(value, BYTE_ORDER) << -pad
+
+    def struct_code(self):
+        if self._byte_aligned:
+            return "%ds" % (self.length // 8)
+        return None
+
+    def write(self, instance, value):
+        self._check_size(value)
+        super().write(instance, value)
+
+    def _check_size(self, value):
+        # struct would pad or truncate it silently
+        if value and self._struct is not None and len(value) != self._struct.size:
+            raise ValueError("{} must be {} bytes, got {}".format(self.attr_name, self._struct.size, len(value)))
+
 
 class BitsField(FieldBase):
     def bits2py(self, bits: Bits) -> Bits:
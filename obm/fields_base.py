@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 # coding=utf-8
+import struct
+from .consts import BYTE_ORDER
 from .datastruct import Bits
 
 
@@ -18,6 +20,16 @@ class FieldBase:
         self._byte_end = 0
         self._first_byte_trail_spare = 0
         self._first_byte_mask = 0xff
+        self._byte_aligned = False
+        self._var_index = 0
+        # struct.Struct reading and writing the field straight in the bytes
+        #   of solid_data, for byte-aligned fields, see `struct_code`
+        self._struct = None
+
+    # whether int2py() is the identity, lets the codec skip the call
+    raw_is_py = False
+    # whether this field is a checksum, see obm.fields_extended.ChecksumField
+    is_checksum = False
 
     def getter(self, instance, owner=None):
         """
@@ -26,19 +38,33 @@ class FieldBase:
         if instance is None:
             return self
 
+        if self._struct is not None:
+            # cheaper than the cache
+            try:
+                return self._struct.unpack_from(instance.solid_data, self._byte_start)[0]
+            except struct.error:
+                # solid_data of a truncated package, read what is there
+                pass
+
+        cache = instance._cache
+        if cache is not None and self.attr_name in cache:
+            return cache[self.attr_name]
+
         if not self.variable:
             buff = instance.solid_data
             bits = buff[self.offset: self.offset + self.length]
         else:
             buff = instance.variable_data
-            offset = instance._varfields[self.attr_name]["offset"]
-            length = instance._varfields[self.attr_name]["length"]
-            bits = buff[offset: offset + length]
+            offset = instance._var_layout[self._var_index]
+            bits = buff[offset: instance._var_layout[self._var_index + 1]]
 
         # if self._first_byte_mask != 0xff:
         #     data_bytes[0] &= self._first_byte_mask
 
-        return self.bits2py(bits)
+        value = self.bits2py(bits)
+        if cache is not None:
+            cache[self.attr_name] = value
+        return value
 
     __get__ = getter
 
@@ -50,20 +76,56 @@ class FieldBase:
         if instance is None:
             raise ValueError()
 
+        if instance._checksum_auto:
+            state = instance._checksum_prepare(self)
+            self.write(instance, value)
+            instance._checksum_commit(state)
+        else:
+            self.write(instance, value)
+
+    def write(self, instance, value):
+        """
+        the actual work of `setter`, without keeping checksums up to date
+
+        :type instance: PackageBase
+        """
+        if instance._cache is not None:
+            instance._cache.pop(self.attr_name, None)
+
         if not self.variable:
+            if self._struct is not None and value is not None:
+                try:
+                    self._struct.pack_into(instance.solid_data, self._byte_start, value)
+                except struct.error:
+                    # out of range or of another type, let py2bits handle or reject it
+                    pass
+                else:
+                    return
             if value is None:
                 dec = 0
             else:
                 dec = self.py2bits(value, self.length, instance=instance).tobits()
             instance.solid_data[self.offset: self.offset + self.length] = dec
         else:
-            offset = instance._varfields[self.attr_name]["offset"]
-            length = instance._varfields[self.attr_name]["length"]
+            offset = instance._var_layout[self._var_index]
+            length = instance._var_layout[self._var_index + 1] - offset
             if value is None:
                 dec = 0
             else:
                 dec = self.py2bits(value, length, instance=instance).tobits()
-            instance.variable_data[offset: offset + length] = dec
+            variable = instance.variable_data
+            if variable.readonly:
+                # shares a read-only buffer, see `frombuffer(fields=...)`
+                variable = instance.variable_data = Bits(variable)
+            variable[offset: offset + length] = dec
+
+    def header_span(self, instance):
+        """:return: (start, end) bit offsets of this field in the header of `instance`"""
+        if not self.variable:
+            return self.offset, self.offset + self.length
+        layout = instance._var_layout
+        return instance.solid_length + layout[self._var_index], \
+               instance.solid_length + layout[self._var_index + 1]
 
     def var_alloc(self, instance):
         """
@@ -72,11 +134,7 @@ class FieldBase:
         """
         length = self.length(instance)
 
-        instance._varfields[self.attr_name] = dict(
-            length=length,
-            offset=len(instance.variable_data),
-        )
-
+        instance._var_layout.append(len(instance.variable_data) + length)
         instance.variable_data.extend(Bits(length))
         return length
 
@@ -95,6 +153,57 @@ class FieldBase:
     def py2bits(self, value: Bits, length: int, instance=None) -> Bits:
         return value
 
+    def int2py(self, raw: int):
+        """
+        convert the raw unsigned integer of a solid field to python value,
+            used by the compiled codec (see obm.codec.SolidCodec)
+        """
+        return self.bits2py(Bits.fromint(raw, self.length))
+
+    def py2int(self, value) -> int:
+        """reverse of int2py()"""
+        if value is None:
+            return 0
+        return int(self.py2bits(value, self.length).tobits())
+
+    def struct_code(self):
+        """
+        struct format code of this field, or None if the field
+            can not be packed by struct
+        """
+        return None
+
+    def struct_accessor(self):
+        """
+        struct.Struct reading and writing this field in the bytes of solid_data,
+            or None if it has no `struct_code`, or if a subclass changed
+            the conversions that the struct code stands for
+        """
+        code = self.struct_code()
+        if code is None or not self._shortcut_of_conversions("struct_code"):
+            return None
+        return struct.Struct((">" if BYTE_ORDER == "big" else "<") + code)
+
+    def converts_raw(self) -> bool:
+        """
+        whether `int2py`/`py2int` are specialized shortcuts of the
+            `bits2py`/`py2bits` of this field, which the codec may use
+            instead of them, see obm.codec.SolidCodec
+        """
+        return self._shortcut_of_conversions("int2py") and self._shortcut_of_conversions("py2int")
+
+    def _shortcut_of_conversions(self, method) -> bool:
+        """
+        whether `method` was written for the bits2py/py2bits of this field:
+            defined by a subclass of FieldBase which a subclass of it
+            did not override the conversions of since
+        """
+        cls = type(self)
+        owner = next(klass for klass in cls.__mro__ if method in klass.__dict__)
+        if owner is FieldBase:
+            return False
+        return all(getattr(cls, name) is getattr(owner, name) for name in ("bits2py", "py2bits"))
+
     def __repr__(self):
         return "{}<{} {}>".format(
             self.__class__.__name__,
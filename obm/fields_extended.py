@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # coding=utf-8
 import collections
-from .datastruct import Bits
+from .consts import *
+from .utils import one_complement_checksum
+from .datastruct import Bits, FrozenBits
 from .fields_base import FieldBase
+from .fields import IntField
 from .model_base import PackageBase
 
 
@@ -14,14 +17,85 @@ class PrefixedOptionsField(FieldBase):
         for key, value in options.items():
             if isinstance(key, (bytes, bytearray)):
                 key = Bits.frombytes(key)
+            key = FrozenBits(key)
 
             self.options[key] = value
 
             lengths.add(len(key))
 
         self._options_key_length_choices = sorted(lengths)
+        self._dispatch = self._compile_dispatch()
+
+    @staticmethod
+    def _option_entry(opt):
+        """:return: (option, is_model, bits consumed by a non-model option)"""
+        if isinstance(opt, Bits):
+            return opt, False, len(opt)
+        if isinstance(opt, (bytes, bytearray)):
+            return opt, False, len(opt) * 8
+        return opt, True, 0
+
+    def _compile_dispatch(self):
+        """
+        compile byte-multiple option prefixes into a byte-indexed trie,
+            every level is a 256-entry table of None or (entry, next_table),
+            entry being None if no prefix ends at this byte
+
+        :return: the root table, or None if some prefix is not byte-multiple
+        """
+        if any(length % 8 or not length for length in self._options_key_length_choices):
+            return None
+        root = [None] * 256
+        # shorter prefixes first: like the linear scan, the shortest match wins
+        for key in sorted(self.options, key=len):
+            table = root
+            prefix = key.tobytes()
+            for n, byte in enumerate(prefix):
+                entry, next_table = table[byte] or (None, None)
+                if n == len(prefix) - 1:
+                    if entry is None:
+                        entry = self._option_entry(self.options[key])
+                elif next_table is None:
+                    next_table = [None] * 256
+                table[byte] = (entry, next_table)
+                table = next_table
+        return root
 
     def bits2py(self, bits: Bits) -> list:
+        if self._dispatch is None:
+            return self._bits2py_generic(bits)
+
+        length = len(bits)
+        data = bits.tobytes()
+        min_length = self._options_key_length_choices[0]
+        i = 0
+        result = list()
+        while i + min_length <= length:
+            table = self._dispatch
+            j = i
+            while True:
+                if j + 8 > length:
+                    raise ValueError("unable to decode")
+                slot = table[data[j >> 3] if not j % 8 else int(bits[j:j + 8])]
+                if slot is None:
+                    raise ValueError("unable to decode")
+                entry, table = slot
+                j += 8
+                if entry is not None:
+                    break
+                if table is None:
+                    raise ValueError("unable to decode")
+
+            opt, is_model, consumed = entry
+            if is_model:
+                opt = opt.frombuffer(bits, i, drop_payload=True)
+                consumed = len(opt)
+            result.append(opt)
+            i += consumed
+
+        return result
+
+    def _bits2py_generic(self, bits: Bits) -> list:
         length = len(bits)
         i = 0
         offset = self._options_key_length_choices[0]
@@ -35,19 +109,13 @@ class PrefixedOptionsField(FieldBase):
                 if piece not in self.options:
                     continue
 
-                opt = self.options[piece]
-
-                if not isinstance(opt, (bytes, bytearray)) and issubclass(opt, PackageBase):
-                    if opt.variable_fields:
-                        opt = opt.frombits(bits[i:], drop_payload=True)
-                    else:
-                        opt = opt.frombits(bits[i:i + opt.solid_length], drop_payload=True)
+                opt, is_model, consumed = self._option_entry(self.options[piece])
+                if is_model:
+                    opt = opt.frombuffer(bits, i, drop_payload=True)
+                    consumed = len(opt)
 
                 result.append(opt)
-                if isinstance(opt, (bytearray, bytes)):
-                    i += len(Bits.frombytes(opt))
-                else:
-                    i += len(opt)
+                i += consumed
 
                 break
 
@@ -69,3 +137,285 @@ class PrefixedOptionsField(FieldBase):
             else:
                 raise ValueError()
         return buffer.ljust(length)
+
+
+class TLVList:
+    """
+    decoded value of a TLVField: the raw bytes plus an index of
+        (type, start, end) byte offsets of every entry, built in one scan
+
+    entries are only decoded when asked for, and re-encoding splices
+        the modified entries between the untouched raw ones.
+        after modifying it, assign it back to the field to write it.
+    """
+
+    def __init__(self, field, data: bytes):
+        """
+        :type field: TLVField
+        """
+        self.field = field
+        self._data = data
+        self._index, self._padding_start = field.scan(data)
+        # replacement bytes of modified entries, None for untouched ones
+        self._pieces = [None] * len(self._index)
+        self._by_type = None
+        self._modified = False
+
+    def __len__(self):
+        return len(self._index)
+
+    def types(self) -> list:
+        return [entry[0] for entry in self._index]
+
+    def find(self, type_) -> int:
+        """index of the first entry of `type_`, or -1"""
+        if self._by_type is None:
+            self._by_type = {}
+            for i, entry in enumerate(self._index):
+                self._by_type.setdefault(entry[0], i)
+        return self._by_type.get(type_, -1)
+
+    def raw(self, i) -> bytes:
+        """raw bytes of the whole entry `i`"""
+        piece = self._pieces[i]
+        if piece is not None:
+            return piece
+        _, start, end = self._index[i]
+        return self._data[start:end]
+
+    def value(self, i) -> bytes:
+        """raw bytes of the value of entry `i`, without type and length"""
+        raw = self.raw(i)
+        if self._index[i][0] in self.field.single_types:
+            return b""
+        return raw[self.field.header_size:]
+
+    def __getitem__(self, i):
+        """entry `i`, decoded by its model in `TLVField.types`, or its raw bytes"""
+        type_ = self._index[i][0]
+        model = self.field.types.get(type_)
+        if model is None:
+            return self.raw(i)
+        return model.frombytes(self.raw(i), drop_payload=True)
+
+    def get(self, type_, default=None):
+        """first entry of `type_`, decoded like `__getitem__`, only this entry is decoded"""
+        i = self.find(type_)
+        if i < 0:
+            return default
+        return self[i]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _entry(self, entry):
+        raw = bytes(entry)
+        index, end = self.field.scan(raw)
+        if len(index) != 1 or end != len(raw):
+            raise ValueError("expected a single TLV entry, got {!r}".format(raw))
+        return index[0], raw
+
+    def __setitem__(self, i, entry):
+        """replace entry `i` by a model or the raw bytes of a whole entry"""
+        self._index[i], self._pieces[i] = self._entry(entry)
+        self._by_type = None
+        self._modified = True
+
+    def insert(self, i, entry):
+        index, piece = self._entry(entry)
+        self._index.insert(i, index)
+        self._pieces.insert(i, piece)
+        self._by_type = None
+        self._modified = True
+
+    def append(self, entry):
+        self.insert(len(self), entry)
+
+    def __delitem__(self, i):
+        del self._index[i]
+        del self._pieces[i]
+        self._by_type = None
+        self._modified = True
+
+    def remove(self, type_):
+        """remove the first entry of `type_`"""
+        i = self.find(type_)
+        if i < 0:
+            raise ValueError("no entry of type {}".format(type_))
+        del self[i]
+
+    def tobytes(self) -> bytes:
+        """re-encode, untouched entries are copied from the original bytes"""
+        data = self._data
+        if not self._modified:
+            return data
+        return b"".join(
+            data[start:end] if piece is None else piece
+            for (_, start, end), piece in zip(self._index, self._pieces)
+        ) + data[self._padding_start:]
+
+    __bytes__ = tobytes
+
+    def __repr__(self):
+        return "{}<{}>".format(self.__class__.__name__, " ".join(
+            "{}:{}".format(type_, self.raw(i).hex()) for i, (type_, _, _) in enumerate(self._index)
+        ))
+
+
+class TLVField(FieldBase):
+    """
+    a sequence of type-length-value entries, e.g. TCP or IPv4 options
+
+        options = TLVField(
+            length=lambda self: max(0, 32 * (self.data_offset - 5)),
+            single_types=(0, 1),  # EOL and NOP have no length nor value
+            end_type=0,  # anything after EOL is padding
+            types={8: OptionTimestamp},
+        )
+
+    the value is a TLVList, indexing the entries in one scan
+        without decoding them.
+
+    :param type_length: bits of the type, a multiple of 8
+    :param length_length: bits of the length, a multiple of 8
+    :param length_includes_header: whether the length counts the type and
+        length themselves (True for TCP/IPv4 options), or only the value
+    :param single_types: types made of the type alone
+    :param end_type: type ending the list, the rest is kept as padding
+    :param types: type -> model decoding the whole entry
+    """
+
+    def __init__(self, length, type_length=8, length_length=8, length_includes_header=True,
+                 single_types=(), end_type=None, types: dict = None, name=None, default=()):
+        super().__init__(length, name, default)
+        if type_length % 8 or length_length % 8:
+            raise ValueError("type_length and length_length must be multiples of 8")
+        self.type_size = type_length // 8
+        self.length_size = length_length // 8
+        self.header_size = self.type_size + self.length_size
+        self.length_includes_header = length_includes_header
+        self.single_types = frozenset(single_types)
+        self.end_type = end_type
+        self.types = dict(types or {})
+
+    def read_type(self, data, i):
+        if self.type_size == 1:
+            return data[i]
+        return int.from_bytes(data[i:i + self.type_size], BYTE_ORDER)
+
+    def scan(self, data: bytes):
+        """
+        :return: ([[type, start, end], ...], start of the trailing padding)
+        """
+        index = []
+        i = 0
+        total = len(data)
+        type_size, header_size = self.type_size, self.header_size
+        while i + type_size <= total:
+            type_ = self.read_type(data, i)
+            if type_ in self.single_types:
+                end = i + type_size
+            else:
+                if i + header_size > total:
+                    raise ValueError("truncated TLV entry at byte {}".format(i))
+                length = int.from_bytes(data[i + type_size:i + header_size], BYTE_ORDER)
+                if self.length_includes_header:
+                    if length < header_size:
+                        raise ValueError("invalid TLV length {} at byte {}".format(length, i))
+                    end = i + length
+                else:
+                    end = i + header_size + length
+                if end > total:
+                    raise ValueError("truncated TLV entry at byte {}".format(i))
+            index.append([type_, i, end])
+            i = end
+            if type_ == self.end_type:
+                break
+        return index, i
+
+    def bits2py(self, bits: Bits) -> TLVList:
+        return TLVList(self, bits.tobytes())
+
+    def py2bits(self, value, length: int, **kwargs) -> Bits:
+        if isinstance(value, TLVList):
+            data = value.tobytes()
+        else:
+            data = b"".join(bytes(v) for v in value)
+        return Bits.frombytes(data).ljust(length)
+
+
+class ChecksumField(IntField):
+    """
+    16-bit one's complement checksum (RFC 1071) of the package, e.g.
+
+        checksum = ChecksumField()  # IPv4, the header only
+        checksum = ChecksumField(ChecksumField.PACKAGE,  # TCP, header + payload
+                                 pseudo_header=lambda self: self.pseudo_header(),
+                                 pseudo_fields=("src_ip", "dst_ip"))
+
+    `fill(instance)` computes it from scratch. once a package is decoded
+        or filled, setting a covered field updates the checksum
+        incrementally (RFC 1624), and so does setting a field of the parent
+        which changes the pseudo-header. the full computation is only done
+        again when the covered layout changes or the payload is replaced.
+        in-place modifications of field values or of the payload bits
+        are not seen, call `fill()` after them.
+
+    :param coverage: HEADER (solid and variable part)
+        or PACKAGE (header and payload)
+    :param pseudo_header: callable(instance) -> bytes prepended to the
+        covered data, an even number of bytes usually built from the parent.
+        it returns None when it can't be built, e.g. without a parent,
+        `fill()` then leaves the checksum alone
+    :param pseudo_fields: names of the parent fields the pseudo-header
+        is built from, writes of other parent fields skip it.
+        None if unknown, the pseudo-header is then checked on every write
+    """
+    HEADER = "header"
+    PACKAGE = "package"
+
+    is_checksum = True
+
+    def __init__(self, coverage=HEADER, pseudo_header=None, pseudo_fields=None, name=None, default=0):
+        super().__init__(16, name, default)
+        if coverage not in (self.HEADER, self.PACKAGE):
+            raise ValueError("unknown checksum coverage {!r}".format(coverage))
+        self.coverage = coverage
+        self.pseudo_header = pseudo_header
+        self.pseudo_fields = None if pseudo_fields is None else frozenset(pseudo_fields)
+
+    def covered_data(self, instance, pseudo=None) -> bytes:
+        """
+        the bytes this checksum is computed over, as they are now
+
+        :param pseudo: the pseudo-header if already built
+        :return: None if the pseudo-header can't be built
+        """
+        if self.pseudo_header is not None and pseudo is None:
+            pseudo = self.pseudo_header(instance)
+            if pseudo is None:
+                return None
+        if self.coverage == self.HEADER:
+            data = instance.header_data.tobytes()
+        else:
+            data = bytes(instance)
+        return data if pseudo is None else pseudo + data
+
+    def fill(self, instance):
+        """
+        recompute the checksum from scratch, and keep it up to date from now on.
+            a checksum whose pseudo-header can't be built is left alone
+
+        :type instance: PackageBase
+        """
+        pseudo = None
+        if self.pseudo_header is not None:
+            pseudo = self.pseudo_header(instance)
+            if pseudo is None:
+                return
+        self.write(instance, 0)
+        self.write(instance, one_complement_checksum(self.covered_data(instance, pseudo)))
+        instance._checksum_auto = True
+        if self.pseudo_header is not None and instance.parent is not None:
+            instance.parent._checksum_auto = True
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+predicates evaluated on raw bytes, without decoding packages
+
+    >>> match = Ethernet.compile_filter("payload.protocol == 6 and payload.payload.dst_port in {80, 443}")
+    >>> web = [Ethernet.frombytes(frame) for frame in frames if match(frame)]
+
+an expression is python syntax: `and`, `or`, `not`, comparisons and
+    constants (numbers, bytes, sets...), and names of solid fields.
+    `payload.<name>` goes down to the payload, through the `payload_types`
+    table of the model: it implies a test of its `payload_key`, a package
+    whose payload is not a model having that field does not match.
+
+every field is read from its byte offset with shifts and masks, the offsets
+    of payloads are computed from the header lengths, like `header_bits` does
+"""
+import ast
+import sys
+from .consts import *
+from .fields_base import FieldBase
+from .layout import LAYOUT_CACHE_SIZE
+
+_COMPARISONS = {
+    ast.Eq: "==", ast.NotEq: "!=",
+    ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=",
+    ast.In: "in", ast.NotIn: "not in",
+}
+
+# header length of unframable packages, fails the length checks
+_NO_MATCH = sys.maxsize
+# whether generated code may keep payload offsets with `:=`
+#   instead of computing them for every field read
+_ASSIGNMENT_EXPRESSIONS = sys.version_info >= (3, 8)
+
+
+class _HeaderLength:
+    """byte length of the header of a model with variable fields, read from raw bytes"""
+
+    def __init__(self, model):
+        """:type model: type[obm.model_base.PackageBase]"""
+        self.model = model
+        self.solid_bytes = model.solid_length // 8
+        layout = model._layout
+        self.key_ranges = layout.key_ranges if layout.cacheable else None
+        self.cache = {}
+
+    def __call__(self, buffer, base):
+        key_ranges = self.key_ranges
+        if key_ranges is None:
+            return self.compute(buffer, base)
+        if len(key_ranges) == 1:
+            start, end = key_ranges[0]
+            # e.g. the byte holding ihl of IPv4
+            key = buffer[base + start] if end - start == 1 else bytes(buffer[base + start:base + end])
+        else:
+            key = tuple(bytes(buffer[base + start:base + end]) for start, end in key_ranges)
+        length = self.cache.get(key)
+        if length is None:
+            length = self.compute(buffer, base)
+            if len(self.cache) < LAYOUT_CACHE_SIZE:
+                self.cache[key] = length
+        return length
+
+    def compute(self, buffer, base):
+        bits = self.model.header_bits(buffer[base:base + self.solid_bytes])
+        return _NO_MATCH if bits % 8 else bits // 8
+
+
+class _Offset:
+    """byte offset expression: sum of runtime terms and a constant"""
+
+    def __init__(self, terms, const=0):
+        self.terms = tuple(terms)
+        self.const = const
+
+    def __add__(self, other):
+        if isinstance(other, int):
+            return _Offset(self.terms, self.const + other)
+        return _Offset(self.terms + (other,), self.const)
+
+    def __str__(self):
+        if not self.terms:
+            return str(self.const)
+        if not self.const:
+            return " + ".join(self.terms)
+        return " + ".join(self.terms + (str(self.const),))
+
+
+class FilterCompiler:
+    """
+    translate a filter expression on `model` to python source,
+        see `compile_filter`
+    """
+
+    def __init__(self, model):
+        """:type model: type[obm.model_base.PackageBase]"""
+        self.model = model
+        self.namespace = {}
+        self._names = {}  # id of the object -> name in namespace
+        self._locals = {}  # payload offset expression -> local variable
+
+    def bind(self, prefix, obj):
+        """:return: name of `obj` in the namespace of the generated function"""
+        name = self._names.get(id(obj))
+        if name is None:
+            name = self._names[id(obj)] = "{}{}".format(prefix, len(self.namespace))
+            self.namespace[name] = obj
+        return name
+
+    def compile(self, expression: str) -> str:
+        """:return: source of `match(buffer, offset=0)`"""
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError("invalid filter {!r}: {}".format(expression, e.msg))
+        return (
+            "def match(buffer, offset=0):\n"
+            "    n = len(buffer)\n"
+            "    return {}\n"
+        ).format(self.boolean(tree.body))
+
+    def boolean(self, node) -> str:
+        if isinstance(node, ast.BoolOp):
+            op = " and " if isinstance(node.op, ast.And) else " or "
+            return "({})".format(op.join(self.boolean(value) for value in node.values))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return "(not {})".format(self.boolean(node.operand))
+        if isinstance(node, ast.Compare):
+            operands = [node.left] + list(node.comparators)
+            return "({})".format(" and ".join(
+                self.comparison(left, op, right)
+                for left, op, right in zip(operands, node.ops, operands[1:])
+            ))
+        if self.path(node) is not None:
+            return self.alternatives([
+                "{}bool({})".format(guard, value) for guard, value in self.operand(node)
+            ])
+        return self.constant(node)
+
+    def comparison(self, left, op, right) -> str:
+        symbol = _COMPARISONS.get(type(op))
+        if symbol is None:
+            raise ValueError("unsupported comparison {}".format(type(op).__name__))
+        return self.alternatives([
+            "{}{}{} {} {}".format(left_guard, right_guard, left_value, symbol, right_value)
+            for left_guard, left_value in self.operand(left)
+            for right_guard, right_value in self.operand(right)
+        ])
+
+    @staticmethod
+    def alternatives(items) -> str:
+        return "({})".format(" or ".join("({})".format(item) for item in items))
+
+    def operand(self, node):
+        """:return: list of (guard, value expression), one per way to resolve a field"""
+        names = self.path(node)
+        if names is None:
+            return [("", self.constant(node))]
+        found = self.resolve(self.model, _Offset(["offset"]), "", names)
+        if not found:
+            raise ValueError("{} can not be resolved to a solid field of {} through payload_types".format(
+                ".".join(names), self.model.__name__))
+        return found
+
+    @staticmethod
+    def path(node):
+        """:return: names of a dotted name like `payload.protocol`, or None"""
+        names = []
+        while isinstance(node, ast.Attribute):
+            names.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        names.append(node.id)
+        return names[::-1]
+
+    def constant(self, node) -> str:
+        try:
+            value = ast.literal_eval(node)
+        except ValueError:
+            raise ValueError("unsupported expression {!r}".format(ast.dump(node)))
+        return self.literal(value)
+
+    def literal(self, value) -> str:
+        if isinstance(value, (set, list)):
+            value = frozenset(value) if isinstance(value, set) else tuple(value)
+        if isinstance(value, (bool, int, type(None))):
+            return repr(value)
+        name = "c{}".format(len(self.namespace))
+        self.namespace[name] = value
+        return name
+
+    def resolve(self, model, base, guard, names):
+        """
+        :type model: type[obm.model_base.PackageBase]
+        :param base: byte offset of the package in the buffer
+        :param guard: conditions for the package to be at `base`,
+            as a prefix of an `and` expression
+        """
+        name = names[0]
+        if name != "payload":
+            field = model.solid_fields.get(name)
+            if field is None or len(names) > 1:
+                return []
+            return [("{}n >= {} and ".format(guard, base + field._byte_end), self.read(field, base))]
+
+        if len(names) == 1:
+            raise ValueError("payload is not a field, compare a field of it")
+        if not model._demux_only:
+            # no table, or a custom payload_type()
+            return []
+        key_field = model.solid_fields.get(model.payload_key)
+        if key_field is None or model.solid_length % 8:
+            raise ValueError("payload of {} can not be located in bytes".format(model.__name__))
+
+        solid_bytes = model.solid_length // 8
+        guard += "n >= {} and ".format(base + solid_bytes)
+        key = self.read(key_field, base)
+        payload_guard = ""
+        if model.variable_fields:
+            payload_base = base + "{}(buffer, {})".format(self.bind("h", _HeaderLength(model)), base)
+            if _ASSIGNMENT_EXPRESSIONS:
+                local = self._locals.setdefault(str(payload_base), "p{}".format(len(self._locals)))
+                payload_guard = "n >= ({} := {}) and ".format(local, payload_base)
+                payload_base = _Offset([local])
+        else:
+            payload_base = base + solid_bytes
+        found = []
+        for value, (payload_type, is_model) in model._demux.items():
+            if is_model:
+                found.extend(self.resolve(
+                    payload_type, payload_base,
+                    "{}{} == {} and {}".format(guard, key, self.literal(value), payload_guard),
+                    names[1:],
+                ))
+        return found
+
+    def read(self, field, base) -> str:
+        """:return: expression of the value of a solid field of the package at `base`"""
+        start = base + field._byte_start
+        shift = field._byte_end * 8 - field.offset - field.length
+        if field._byte_end - field._byte_start == 1:
+            raw = "buffer[{}]".format(start)
+        else:
+            raw = "int.from_bytes(buffer[{}:{}], {!r})".format(
+                start, base + field._byte_end, BYTE_ORDER)
+        if shift:
+            raw = "({} >> {})".format(raw, shift)
+        if field.offset % 8:
+            raw = "({} & {})".format(raw, (1 << field.length) - 1)
+        if not field.converts_raw():
+            # a subclass changed the conversions, int2py may not follow them
+            return "{}({})".format(self.bind("int2py", FieldBase.int2py.__get__(field)), raw)
+        if field.raw_is_py:
+            return raw
+        return "{}.int2py({})".format(self.bind("f", field), raw)
+
+
+def compile_filter(model, expression):
+    """
+    compile `expression` to a predicate on the raw bytes of packages
+        of `model`, see the module docstring
+
+    `payload_types` tables are read at compilation, payloads registered
+        later are not seen by the predicate
+
+    :type model: type[obm.model_base.PackageBase]
+    :return: callable(buffer, offset=0) -> bool, `buffer` is bytes-like
+        and `offset` the byte offset of the package in it
+    """
+    compiler = FilterCompiler(model)
+    source = compiler.compile(expression)
+    namespace = compiler.namespace
+    exec(source, namespace)
+    match = namespace["match"]
+    match.source = source
+    return match
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+opt-in statistics of what obm spends its time on
+
+    >>> from obm import instrument
+    >>> with instrument.profile() as result:
+    ...     handle(Ethernet.frombytes(frame))
+    >>> print(result.snapshot.report())
+
+or for a whole process:
+
+    >>> instrument.enable()
+    >>> ...
+    >>> stats = instrument.snapshot()
+    >>> stats.models["IP"].decodes, stats.fields["IP.options"].conversion_time
+
+while enabled, the decode/encode methods of models and the accessors and
+    conversions of fields are replaced by counting wrappers, `disable()`
+    puts the original functions back: disabled, there is no overhead at all.
+
+times are cumulative: decoding a model includes decoding its payload,
+    encoding it includes encoding its payload. counters are not
+    synchronized, use them from one thread at a time
+"""
+import os
+import time
+import tracemalloc
+from .fields_base import FieldBase
+from .model_base import PackageBase
+
+# conversion methods of fields replaced while enabled
+_FIELD_CONVERSIONS = ("bits2py", "py2bits", "int2py", "py2int")
+
+# allocation sites reported by snapshots
+ALLOCATION_SITES = 20
+
+_OBM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (owner, attribute name, original value) while enabled, else None
+_patched = None
+_models = {}  # model class -> ModelStats
+_fields = {}  # field -> FieldStats
+_sample_every = 0  # decodes between allocation samples, 0 if not tracing
+_started_tracemalloc = False
+# whether a conversion is running, conversions calling each other
+#   (e.g. FieldBase.int2py calling bits2py) are counted once
+_converting = False
+
+
+class ModelStats:
+    """counters of one model class"""
+    __slots__ = ("decodes", "decode_bytes", "decode_time",
+                 "encodes", "encode_bytes", "encode_time",
+                 "samples", "sampled_bytes")
+
+    def __init__(self):
+        self.decodes = 0
+        self.decode_bytes = 0  # bytes of the decoded headers (solid and variable parts)
+        self.decode_time = 0.0
+        self.encodes = 0
+        self.encode_bytes = 0
+        self.encode_time = 0.0
+        # decodes measured with tracemalloc, and the memory they kept allocated
+        self.samples = 0
+        self.sampled_bytes = 0
+
+    @property
+    def bytes_per_decode(self) -> float:
+        """memory kept allocated by a decode, on average over the samples"""
+        return self.sampled_bytes / self.samples if self.samples else 0.0
+
+    def copy(self):
+        other = type(self)()
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def __sub__(self, other):
+        result = type(self)()
+        for name in self.__slots__:
+            setattr(result, name, getattr(self, name) - getattr(other, name))
+        return result
+
+    def __repr__(self):
+        return "ModelStats<decodes={} encodes={}>".format(self.decodes, self.encodes)
+
+
+class FieldStats:
+    """counters of one field of a model"""
+    __slots__ = ("gets", "sets", "conversions", "conversion_time")
+
+    def __init__(self):
+        self.gets = 0
+        self.sets = 0
+        # calls of bits2py/py2bits/int2py/py2int
+        self.conversions = 0
+        self.conversion_time = 0.0
+
+    copy = ModelStats.copy
+    __sub__ = ModelStats.__sub__
+
+    def __repr__(self):
+        return "FieldStats<gets={} sets={} conversions={}>".format(self.gets, self.sets, self.conversions)
+
+
+class Snapshot:
+    """
+    counters at some point, or between two points when subtracted
+
+    :ivar models: dict of model qualname -> ModelStats
+    :ivar fields: dict of "Model.field" -> FieldStats
+    :ivar allocations: dict of "file:line" in obm -> (count, size) of the
+        blocks allocated there and still alive, when tracing allocations
+    """
+
+    def __init__(self, models, fields, allocations):
+        self.models = models
+        self.fields = fields
+        self.allocations = allocations
+
+    def __sub__(self, other):
+        def diff(mine, theirs, empty):
+            result = {}
+            for name, stats in mine.items():
+                stats = stats - theirs.get(name, empty)
+                if any(getattr(stats, slot) for slot in stats.__slots__):
+                    result[name] = stats
+            return result
+
+        allocations = {}
+        for site, (count, size) in self.allocations.items():
+            old_count, old_size = other.allocations.get(site, (0, 0))
+            if count > old_count or size > old_size:
+                allocations[site] = (count - old_count, size - old_size)
+        return Snapshot(diff(self.models, other.models, ModelStats()),
+                        diff(self.fields, other.fields, FieldStats()), allocations)
+
+    def report(self) -> str:
+        """:return: text tables, the most expensive first"""
+        lines = ["{:<32}{:>10}{:>12}{:>12}{:>10}{:>12}{:>12}".format(
+            "model", "decodes", "bytes", "time (s)", "encodes", "bytes", "time (s)")]
+        for name, s in sorted(self.models.items(), key=lambda item: -item[1].decode_time - item[1].encode_time):
+            lines.append("{:<32}{:>10}{:>12}{:>12.6f}{:>10}{:>12}{:>12.6f}".format(
+                name, s.decodes, s.decode_bytes, s.decode_time, s.encodes, s.encode_bytes, s.encode_time))
+        lines.append("")
+        lines.append("{:<32}{:>10}{:>10}{:>12}{:>12}".format("field", "gets", "sets", "conversions", "time (s)"))
+        for name, s in sorted(self.fields.items(), key=lambda item: -item[1].conversion_time):
+            lines.append("{:<32}{:>10}{:>10}{:>12}{:>12.6f}".format(
+                name, s.gets, s.sets, s.conversions, s.conversion_time))
+        if self.allocations:
+            lines.append("")
+            lines.append("{:<32}{:>10}{:>12}".format("allocated at", "blocks", "bytes"))
+            for site, (count, size) in sorted(self.allocations.items(), key=lambda item: -item[1][1]):
+                lines.append("{:<32}{:>10}{:>12}".format(site, count, size))
+        return "\n".join(lines)
+
+
+def _model_stats(model):
+    stats = _models.get(model)
+    if stats is None:
+        stats = _models[model] = ModelStats()
+    return stats
+
+
+def _field_stats(field):
+    stats = _fields.get(field)
+    if stats is None:
+        stats = _fields[field] = FieldStats()
+    return stats
+
+
+def _wrap_decode(original):
+    def _decode(self, *args, **kwargs):
+        stats = _model_stats(type(self))
+        stats.decodes += 1
+        sampled = _sample_every and not stats.decodes % _sample_every
+        if sampled:
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = original(self, *args, **kwargs)
+        stats.decode_time += time.perf_counter() - start
+        if sampled:
+            stats.samples += 1
+            stats.sampled_bytes += tracemalloc.get_traced_memory()[0] - before
+        stats.decode_bytes += (len(self.solid_data) + len(self.variable_data)) // 8
+        return result
+
+    return _decode
+
+
+def _wrap_tobytes(original):
+    def tobytes(self):
+        stats = _model_stats(type(self))
+        stats.encodes += 1
+        start = time.perf_counter()
+        result = original(self)
+        stats.encode_time += time.perf_counter() - start
+        stats.encode_bytes += (len(self.solid_data) + len(self.variable_data)) // 8
+        return result
+
+    return tobytes
+
+
+def _wrap_get(original):
+    def __get__(self, instance, owner=None):
+        if instance is not None:
+            _field_stats(self).gets += 1
+        return original(self, instance, owner)
+
+    return __get__
+
+
+def _wrap_set(original):
+    def __set__(self, instance, value):
+        _field_stats(self).sets += 1
+        return original(self, instance, value)
+
+    return __set__
+
+
+def _wrap_conversion(original):
+    def conversion(self, *args, **kwargs):
+        global _converting
+        if _converting:
+            return original(self, *args, **kwargs)
+        _converting = True
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            stats = _field_stats(self)
+            stats.conversion_time += time.perf_counter() - start
+            stats.conversions += 1
+            _converting = False
+
+    conversion.__name__ = original.__name__
+    return conversion
+
+
+def _subclasses(cls):
+    """:return: cls and all its subclasses"""
+    found = [cls]
+    for sub in cls.__subclasses__():
+        found.extend(_subclasses(sub))
+    return found
+
+
+def enabled() -> bool:
+    return _patched is not None
+
+
+def enable(allocations=False, sample_every=100):
+    """
+    start counting, field classes must be defined before
+
+    :param allocations: also trace allocations with tracemalloc, which
+        slows everything down noticeably
+    :param sample_every: with `allocations`, measure one decode
+        of every `sample_every` decodes of a model
+    """
+    global _patched, _sample_every, _started_tracemalloc
+    if allocations:
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1, got {}".format(sample_every))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        _sample_every = sample_every
+    if _patched is not None:
+        return
+
+    _patched = []
+
+    def patch(owner, name, wrapper):
+        original = owner.__dict__[name]
+        _patched.append((owner, name, original))
+        setattr(owner, name, wrapper(original))
+
+    patch(PackageBase, "_decode", _wrap_decode)
+    patch(PackageBase, "tobytes", _wrap_tobytes)
+    # an alias of tobytes, which `bytes()` calls
+    patch(PackageBase, "__bytes__", _wrap_tobytes)
+    patch(FieldBase, "__get__", _wrap_get)
+    patch(FieldBase, "__set__", _wrap_set)
+    for field_class in _subclasses(FieldBase):
+        for name in _FIELD_CONVERSIONS:
+            if name in field_class.__dict__:
+                patch(field_class, name, _wrap_conversion)
+
+
+def disable():
+    """stop counting and restore the original methods, the counters are kept"""
+    global _patched
+    if _patched is None:
+        return
+    for owner, name, original in reversed(_patched):
+        setattr(owner, name, original)
+    _patched = None
+    _stop_allocations()
+
+
+def _stop_allocations():
+    global _sample_every, _started_tracemalloc
+    _sample_every = 0
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def reset():
+    """clear the counters"""
+    _models.clear()
+    _fields.clear()
+
+
+def snapshot() -> Snapshot:
+    """:return: a copy of the counters"""
+    field_names = {}
+    for model in _subclasses(PackageBase):
+        for name, field in model.__dict__.get("fields", {}).items():
+            field_names[field] = "{}.{}".format(model.__qualname__, name)
+
+    allocations = {}
+    if _sample_every and tracemalloc.is_tracing():
+        traces = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, os.path.join(_OBM_DIR, "*")),
+             tracemalloc.Filter(False, os.path.abspath(__file__))])
+        for stat in traces.statistics("lineno")[:ALLOCATION_SITES]:
+            frame = stat.traceback[0]
+            site = "{}:{}".format(os.path.basename(frame.filename), frame.lineno)
+            allocations[site] = (stat.count, stat.size)
+
+    return Snapshot(
+        {model.__qualname__: stats.copy() for model, stats in _models.items()},
+        {field_names.get(field, repr(field)): stats.copy() for field, stats in _fields.items()},
+        allocations,
+    )
+
+
+class profile:
+    """
+    count what a block of code does
+
+    >>> with profile() as result:
+    ...     decode_everything()
+    >>> result.snapshot.models["IP"].decodes
+
+    counting is enabled for the block if it was not, and the
+        counters of the process are left untouched
+    """
+
+    def __init__(self, allocations=False, sample_every=1):
+        self.allocations = allocations
+        self.sample_every = sample_every
+        self.snapshot = None  # type: Snapshot
+        self._was_enabled = False
+        self._was_sampling = 0
+        self._start = None
+
+    def __enter__(self):
+        self._was_enabled = enabled()
+        self._was_sampling = _sample_every
+        enable(self.allocations, self.sample_every)
+        self._start = snapshot()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.snapshot = snapshot() - self._start
+        global _sample_every
+        if not self._was_enabled:
+            disable()
+        elif self.allocations and not self._was_sampling:
+            _stop_allocations()
+        else:
+            _sample_every = self._was_sampling
+        return False
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+resolution of the offsets of variable fields
+"""
+import dis
+
+# layouts cached per model at most, beyond that they are computed each time
+LAYOUT_CACHE_SIZE = 256
+
+
+def length_dependencies(func, solid_fields):
+    """
+    find the solid fields a length function reads from its package,
+        by looking at its bytecode
+
+    :param solid_fields: names of the solid fields of the model
+    :return: set of field names, or None if the function may use its package
+        in another way (methods, variable fields, passing it around...)
+    """
+    code = getattr(func, "__code__", None)
+    if code is None or code.co_argcount < 1:
+        return None
+    self_name = code.co_varnames[0]
+    if self_name in code.co_cellvars:
+        # captured by a nested function or comprehension
+        return None
+
+    instructions = list(dis.get_instructions(code))
+    dependencies = set()
+    for i, instruction in enumerate(instructions):
+        argval = instruction.argval
+        uses_self = argval == self_name or isinstance(argval, tuple) and self_name in argval
+        if not uses_self or not instruction.opname.startswith(("LOAD_FAST", "STORE_FAST", "DELETE_FAST")):
+            continue
+        if instruction.opname != "LOAD_FAST" or i + 1 == len(instructions):
+            return None
+        following = instructions[i + 1]
+        if following.opname != "LOAD_ATTR" or following.argval not in solid_fields:
+            return None
+        dependencies.add(following.argval)
+    return dependencies
+
+
+class VariableLayout:
+    """
+    offsets of the variable fields of a model, computed from its solid fields
+
+    when the length functions only read solid fields (checked by
+        `length_dependencies`), layouts are cached keyed on the raw bytes
+        of those fields, so e.g. every IPv4 header with ihl=5
+        shares one layout. the length functions must not depend on
+        anything else, such as global state.
+    """
+
+    def __init__(self, variable_fields, solid_fields):
+        """
+        :type variable_fields: dict[str, obm.fields_base.FieldBase]
+        :type solid_fields: dict[str, obm.fields_base.FieldBase]
+        """
+        self.lengths = tuple(field.length for field in variable_fields.values())
+
+        dependencies = set()
+        for func in self.lengths:
+            names = length_dependencies(func, solid_fields)
+            if names is None:
+                dependencies = None
+                break
+            dependencies |= names
+        # names of the solid fields the layout depends on, None if unknown
+        self.dependencies = None if dependencies is None else frozenset(dependencies)
+
+        # merged byte ranges of the dependencies in the solid part
+        self.key_ranges = ()
+        if dependencies:
+            ranges = sorted((solid_fields[name]._byte_start, solid_fields[name]._byte_end)
+                            for name in dependencies)
+            merged = [list(ranges[0])]
+            for start, end in ranges[1:]:
+                if start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self.key_ranges = tuple(tuple(r) for r in merged)
+        self.cache = {}
+
+    @property
+    def cacheable(self) -> bool:
+        return self.dependencies is not None
+
+    def compute(self, package) -> tuple:
+        """:return: the layout of `package`, calling every length function"""
+        layout = [0]
+        end = 0
+        for length in self.lengths:
+            end += length(package)
+            layout.append(end)
+        return tuple(layout)
+
+    def resolve(self, package) -> tuple:
+        """
+        :return: the layout of `package`, from the cache when possible,
+            only valid if `cacheable`
+        """
+        raw = package.solid_data.tobytes()
+        if len(self.key_ranges) == 1:
+            start, end = self.key_ranges[0]
+            key = raw[start:end]
+        else:
+            key = tuple(raw[start:end] for start, end in self.key_ranges)
+        layout = self.cache.get(key)
+        if layout is None:
+            layout = self.compute(package)
+            if len(self.cache) < LAYOUT_CACHE_SIZE:
+                self.cache[key] = layout
+        return layout
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 # coding=utf-8
 
-import inspect
 import collections
-from .datastruct import Bits
+from .datastruct import Bits, FrozenBits
 from .fields import FieldBase
+from .codec import SolidCodec
+from .layout import VariableLayout
+from .utils import one_complement_update
 
 
 class MetaPackage(type):
@@ -21,23 +23,25 @@ class MetaPackage(type):
         solid_fields = collections.OrderedDict()
         variable_fields = collections.OrderedDict()
         solid_length = 0
-        variable_length = 0
         for k, v in attrs.items():
             if isinstance(v, FieldBase):
                 fields[k] = v
                 v.attr_name = k
                 if v.variable:
+                    v._var_index = len(variable_fields)
                     variable_fields[k] = v
                 else:
                     solid_fields[k] = v
                     v.offset = solid_length
                     v._byte_start = solid_length // 8
+                    v._byte_end = (solid_length + v.length + 7) // 8  # exclusive
                     head_spare = v.offset - 8 * v._byte_start
-                    v._first_byte_trail_spare = min(8 - head_spare - v.length, 0)
-                    v._byte_end = max((v.length + head_spare - 1) // 8, 0)
+                    v._first_byte_trail_spare = max(8 - head_spare - v.length, 0)
                     v._first_byte_mask = cls.calc_first_byte_mask(
                         head_spare, v._first_byte_trail_spare
                     )
+                    v._byte_aligned = not head_spare and not v.length % 8
+                    v._struct = v.struct_accessor()
 
                     solid_length += v.length
 
@@ -45,10 +49,36 @@ class MetaPackage(type):
         attrs["solid_fields"] = solid_fields
         attrs["solid_length"] = solid_length
         attrs["variable_fields"] = variable_fields
-        attrs["variable_length"] = variable_length
+        # every solid field is read and written with struct, no bit operations
+        attrs["byte_aligned"] = all(v._struct is not None for v in solid_fields.values())
+        checksum_fields = tuple(v for v in fields.values() if v.is_checksum)
+        attrs["_checksum_fields"] = checksum_fields
+        attrs["_pseudo_checksums"] = tuple(v for v in checksum_fields if v.pseudo_header is not None)
+        attrs.setdefault("__slots__", ())
+        attrs["_codec"] = SolidCodec(solid_fields, solid_length)
+        attrs["_layout"] = VariableLayout(variable_fields, solid_fields) if variable_fields else None
+
+        payload_key = attrs.get("payload_key")
+        if payload_key is not None:
+            if payload_key not in fields:
+                raise ValueError("payload_key {!r} of {} is not a field".format(payload_key, name))
+            attrs["payload_types"] = dict(attrs.get("payload_types") or {})
+            attrs["_demux"] = {
+                key: cls.demux_entry(payload_type)
+                for key, payload_type in attrs["payload_types"].items()
+            }
+        else:
+            attrs["_demux"] = None
+        # a custom payload_type() takes precedence over the table
+        attrs["_demux_only"] = attrs["_demux"] is not None and "payload_type" not in attrs
 
         return super().__new__(cls, name, bases, attrs)
 
+    @staticmethod
+    def demux_entry(payload_type):
+        """:return: (payload_type, whether it is a model) for a demux table"""
+        return payload_type, isinstance(payload_type, MetaPackage)
+
     @staticmethod
     def calc_first_byte_mask(head_spare, tail_spare):
         if not head_spare and not tail_spare:
@@ -62,22 +92,111 @@ class MetaPackage(type):
         return mask
 
 
+class _VariableLength:
+    """
+    length of the variable part: per instance from its layout,
+        0 on the model class itself
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return 0
+        return instance._var_layout[-1]
+
+
+# demux table entry of unknown keys
+_NO_PAYLOAD = (None, False)
+
+# layout of instances without variable fields
+_EMPTY_LAYOUT = (0,)
+# their variable_data, shared by decoded instances
+_EMPTY_BITS = FrozenBits()
+
+
+def _readonly(buffer):
+    """`buffer` as read-only Bits, copied if the caller could still modify it"""
+    bits = Bits.frombuffer(buffer)
+    if not bits.readonly:
+        bits = Bits(bits)
+        bits._freeze()
+    return bits
+
+
+def _copy_into(old, bits, start, end):
+    """
+    bits [start, end) copied into `old` if it has that length, else into new Bits
+
+    :param old: Bits owned by the package being decoded into, or None
+    """
+    if old is not None and len(old) == end - start and not start % 8 and not end % 8 and len(bits) >= end:
+        memoryview(old)[:] = memoryview(bits)[start // 8:end // 8]
+        return old
+    return bits[start:end]
+
+
 class PackageBase(metaclass=MetaPackage):
     # fields = collections.OrderedDict()  # placeholder
     # solid_fields = collections.OrderedDict()  # placeholder
     # variable_fields = collections.OrderedDict()  # placeholder
     # solid_length = 0  # placeholder
 
+    # MetaPackage gives every model an empty __slots__ unless it defines one,
+    #   so instances carry no __dict__
+    __slots__ = (
+        "parent", "solid_data", "variable_data",
+        # bit offsets of the variable fields in variable_data,
+        #   plus the end of the last one, see `alloc_variable_fields`
+        "_var_layout",
+        # decoded field values, only used by lazy decoding, see `frombuffer`
+        "_cache",
+        # raw payload waiting for `payload_type` dispatch, see `frombuffer`
+        "_payload", "_payload_lazy", "_payload_lazy_offset",
+        # whether _payload is raw Bits sharing the buffer decoded from,
+        #   copied on first access, see `payload_view`
+        "_payload_shared",
+        # decode limits of the lazy payload, see `_decode_limits`
+        "_limits",
+        # buffer this package was decoded from and its bit offset in it,
+        #   kept while the layout still matches, see `tobytes`
+        "_source", "_source_offset",
+        # solid_data and variable_data as copied out by `_decode`,
+        #   copied into again by `decode_into` while they are still set
+        "_owned_solid", "_owned_variable",
+        # whether setting fields keeps the checksums up to date,
+        #   see `_checksum_prepare`
+        "_checksum_auto",
+        "__weakref__",
+    )
+
+    variable_length = _VariableLength()
+
+    # declarative payload dispatch, see `payload_type`
+    payload_key = None
+    payload_types = None
+
     def __init__(self, parent=None, payload=None, _blank_init=False, **kwargs):
+        self._cache = None
+        self._var_layout = _EMPTY_LAYOUT
+        self._source = None
+        self._owned_solid = self._owned_variable = None
+        self._checksum_auto = False
         self.payload = payload if payload is not None else Bits()
         self.parent = parent
 
         if _blank_init:
             return
 
-        self.solid_data = Bits(self.solid_length)
-        for fname, field in self.solid_fields.items():  # type: str,FieldBase
-            setattr(self, fname, kwargs.get(fname, field.default))
+        codec = self._codec
+        values = [
+            kwargs.get(fname, field.default)
+            for fname, field in self.solid_fields.items()  # type: str,FieldBase
+        ]
+        for i, field in codec.inexact:
+            values[i] = None
+        self.solid_data = Bits.frombytes(codec.encode(values))[:self.solid_length]
+        for i, field in codec.inexact:
+            # not encoded by the codec, their py2bits may need the instance
+            setattr(self, field.attr_name, kwargs.get(field.attr_name, field.default))
 
         if self.variable_fields:
             self.alloc_variable_fields()
@@ -86,57 +205,530 @@ class PackageBase(metaclass=MetaPackage):
         else:
             self.variable_data = Bits()
 
+    @property
+    def payload(self):
+        payload = self.payload_view
+        if self._payload_shared:
+            # copy on first access: the window may be read-only,
+            #   or belong to a buffer the caller still uses
+            payload = self._payload = Bits(payload)
+            self._payload_shared = False
+        return payload
+
+    @payload.setter
+    def payload(self, value):
+        self._payload_lazy = False
+        self._payload_shared = False
+        self._payload = value
+        # the new payload has nothing to do with the source buffer anymore
+        self._source = None
+        if self._checksum_auto:
+            for field in self._checksum_fields:
+                if field.coverage == field.PACKAGE:
+                    field.fill(self)
+
+    @property
+    def payload_view(self):
+        """
+        the payload without copying a raw payload out of the buffer it was
+            decoded from: read-only for read-only buffers such as bytes,
+            writing-through for bytearray/mmap. a model payload is the same
+            as `payload`
+        """
+        if self._payload_lazy:
+            self._payload_lazy = False
+            self._payload = self._dispatch_payload(
+                self._payload, self._payload_lazy_offset, lazy=True, limits=self._limits)
+        return self._payload
+
+    def _dispatch_payload(self, bits, offset, lazy=False, reuse=None, limits=None):
+        """
+        decode the raw payload, which starts at `offset` of `bits`
+
+        :param reuse: previous payload, decoded into again if it is
+            an instance of the new payload type, see `decode_into`
+        :param limits: decode limits of the payload, see `_decode_limits`
+        """
+        if self._demux_only:
+            payload_type, is_model = self._demux.get(getattr(self, self.payload_key), _NO_PAYLOAD)
+            if not is_model:
+                payload = self._payload = Bits.window(bits, offset)
+        else:
+            payload = self._payload = Bits.window(bits, offset)
+            payload_type = self.payload_type()
+            # a class made by MetaPackage is a model
+            is_model = isinstance(payload_type, MetaPackage)
+        if payload_type is not None:
+            if is_model:
+                if type(reuse) is payload_type:
+                    payload = reuse._redecode(bits, offset, False, self, lazy, limits)
+                else:
+                    payload = payload_type(_blank_init=True)._decode(
+                        bits, offset, False, self, lazy, limits=limits)
+                if payload._pseudo_checksums:
+                    # its checksums depend on our fields
+                    self._checksum_auto = True
+            else:
+                # noinspection PyCallingNonCallable
+                payload = payload_type(Bits(payload), parent=self)
+        self._payload_shared = payload_type is None
+        return payload
+
     def alloc_variable_fields(self):
-        self._varfields = collections.OrderedDict()
-        self.variable_length = 0
+        self._source = None
+        if self._cache is not None:
+            self._cache.clear()
+        layout = self._layout
+        if layout is not None and layout.cacheable:
+            self._var_layout = layout.resolve(self)
+            self.variable_data = Bits(self._var_layout[-1])
+            return
+
+        # the length functions may read anything, lay the fields out one by one
+        self._var_layout = [0]
         self.variable_data = Bits()
         for fname, field in self.variable_fields.items():  # type:str,FieldBase
             field.var_alloc(self)
 
-        self.variable_length = len(self.variable_data)
+        self._var_layout = tuple(self._var_layout)
+
+    def _locate_variable_fields(self):
+        """
+        set `_var_layout` from the solid fields, like `alloc_variable_fields`
+            but without allocating variable_data when possible,
+            which is then to be set by the caller
+        """
+        layout = self._layout
+        if layout.cacheable:
+            self._var_layout = layout.resolve(self)
+        else:
+            self.alloc_variable_fields()
 
     def __len__(self):
-        return self.solid_length + self.variable_length + len(self.payload)
+        if self._payload_lazy:
+            return self.solid_length + self.variable_length \
+                   + len(self._payload) - self._payload_lazy_offset
+        return self.solid_length + self.variable_length + len(self.payload_view)
 
     def tobytes(self):
-        return bytes(self.solid_data) + bytes(self.variable_data) + bytes(self.payload)
+        if self._source is not None and not self._source_offset % 8:
+            data = self._tobytes_incremental()
+            if data is not None:
+                return data
+        if self._payload_lazy:
+            # not decoded yet, the raw payload is exactly what it would encode to
+            payload = Bits.window(self._payload, self._payload_lazy_offset)
+        else:
+            payload = self.payload_view
+        return bytes(self.solid_data) + bytes(self.variable_data) + bytes(payload)
+
+    def _tracked_chain(self):
+        """
+        :return: list of the layers from self down the payload chain,
+            or None if some of them no longer map onto the source buffer
+        """
+        source = self._source
+        layers = []
+        layer = self
+        while True:
+            if layer._source is not source:
+                return None
+            layers.append(layer)
+            if layer._payload_lazy:
+                return layers
+            payload = layer._payload
+            if isinstance(payload, Bits):
+                # a copied raw payload may have been modified
+                return layers if layer._payload_shared else None
+            if not isinstance(payload, PackageBase):
+                return None
+            layer = payload
+
+    def _tobytes_incremental(self):
+        """
+        copy the source span of the whole chain once, then write
+            the headers of the layers over it: only the payload
+            is taken from the source, the headers may have been
+            modified in place or replaced
+
+        :return: None if the chain can't be encoded that way
+        """
+        layers = self._tracked_chain()
+        if layers is None:
+            return None
+        start = self._source_offset
+        out = bytearray(memoryview(self._source)[start // 8:])
+        for layer in layers:
+            solid, variable = layer.solid_data, layer.variable_data
+            if len(solid) != layer.solid_length or len(variable) != layer._var_layout[-1] \
+                    or len(variable) % 8 or len(solid) % 8:
+                # the layout changed, the payload is not where the source has it anymore
+                return None
+            base = (layer._source_offset - start) // 8
+            end = base + len(solid) // 8
+            out[base:end] = solid.tobytes()
+            out[end:end + len(variable) // 8] = variable.tobytes()
+        return bytes(out)
 
     __bytes__ = tobytes
 
+    def _header_bytes(self, start, end):
+        """header bytes [start, end), or None if the header is shorter"""
+        solid = self.solid_data
+        if end * 8 <= len(solid):
+            return solid.tobytes()[start:end]
+        header = self.header_data
+        if end * 8 <= len(header):
+            return header[start * 8:end * 8].tobytes()
+        return None
+
+    def _checksum_prepare(self, field):
+        """
+        snapshot the data covered by checksums which writing `field`
+            may invalidate: the 16-bit words of our header holding the field,
+            and the pseudo-headers of the payload
+
+        :type field: FieldBase
+        :return: state for `_checksum_commit`
+        """
+        own = None
+        if self._checksum_fields and not field.is_checksum:
+            start, end = field.header_span(self)
+            # pseudo-headers are an even number of bytes,
+            #   so header offsets keep their word alignment
+            start = start // 8 & ~1
+            end = ((end + 7) // 8 + 1) & ~1
+            own = (start, end, self._header_bytes(start, end),
+                   len(self.solid_data) + len(self.variable_data))
+
+        pseudo = None
+        name = field.attr_name
+        payload = self._payload
+        if self._payload_lazy:
+            # only decode the payload if its pseudo-headers may use the field
+            payload_type = self.payload_type()
+            if isinstance(payload_type, MetaPackage) and any(
+                    f.pseudo_fields is None or name in f.pseudo_fields
+                    for f in payload_type._pseudo_checksums):
+                payload = self.payload
+        if isinstance(payload, PackageBase) and payload._pseudo_checksums \
+                and payload._checksum_auto and payload.parent is self:
+            olds = [(f, f.pseudo_header(payload)) for f in payload._pseudo_checksums
+                    if f.pseudo_fields is None or name in f.pseudo_fields]
+            if olds:
+                pseudo = (payload, olds)
+        return own, pseudo
+
+    def _checksum_commit(self, state):
+        """update the checksums after a field write, see `_checksum_prepare`"""
+        own, pseudo = state
+        if own is not None:
+            start, end, old, header_length = own
+            new = None
+            if old is not None and header_length == len(self.solid_data) + len(self.variable_data):
+                new = self._header_bytes(start, end)
+            for field in self._checksum_fields:
+                if new is None:
+                    field.fill(self)
+                elif new != old:
+                    field.write(self, one_complement_update(field.getter(self), old, new))
+
+        if pseudo is not None:
+            payload, olds = pseudo
+            for field, old in olds:
+                new = field.pseudo_header(payload)
+                if old is None or new is None or len(new) != len(old):
+                    field.fill(payload)
+                elif new != old:
+                    field.write(payload, one_complement_update(field.getter(payload), old, new))
+
     def hex(self) -> str:
         return bytes(self).hex()
 
     def tobits(self):
-        return self.solid_data + self.variable_data + Bits(self.payload)
+        return self.solid_data + self.variable_data + Bits(self.payload_view)
 
     @classmethod
-    def frombytes(cls, bytes: bytes, drop_payload=False, parent=None):
-        c = cls(_blank_init=True)
-        c.parent = parent
-        bits = Bits.frombytes(bytes)
-        c.solid_data = bits[:c.solid_length]
-        c.alloc_variable_fields()
-        c.variable_data = bits[c.solid_length:c.solid_length + c.variable_length]
-        if not drop_payload:
-            c.payload = bits[c.solid_length + c.variable_length:]
-            payload_type = c.payload_type()
-            if payload_type is not None:
-                # noinspection PyTypeChecker
-                if inspect.isclass(payload_type) and issubclass(payload_type, PackageBase):
-                    c.payload = payload_type.frombits(c.payload, parent=c)
-                else:
-                    # noinspection PyCallingNonCallable
-                    c.payload = payload_type(c.payload, parent=c)
-        else:
-            c.payload = Bits()
-        return c
+    def frombytes(cls, bytes: bytes, drop_payload=False, parent=None, lazy=False, **limits):
+        """like `frombuffer`, but a writable input (bytearray...) is copied first, so it can be reused"""
+        return cls.frombuffer(_readonly(bytes), drop_payload=drop_payload, parent=parent, lazy=lazy, **limits)
+
+    @classmethod
+    def frombits(cls, bits: Bits, drop_payload=False, parent=None, lazy=False, **limits):
+        """like `frombytes`"""
+        return cls.frombuffer(_readonly(bits), drop_payload=drop_payload, parent=parent, lazy=lazy, **limits)
 
     @classmethod
-    def frombits(cls, bits: Bits, drop_payload=False, parent=None):
-        return cls.frombytes(bytes(bits), drop_payload=drop_payload, parent=parent)
+    def frombuffer(cls, buffer, offset=0, drop_payload=False, parent=None, lazy=False,
+                   max_depth=None, stop_at=None, fields=None):
+        """
+        decode from `buffer` starting at bit `offset`, without copying the buffer
+
+        only the (small) solid and variable parts are copied, so they can be
+            modified freely. payload models decode from the same buffer,
+            and raw payload is a window of it, copied when `.payload` is
+            first accessed. `.payload_view` gives the window itself.
+
+        with `lazy`, field values are converted on first access and cached
+            on the instance until the field is set again, and `payload_type`
+            is only called when `.payload` is first touched.
+            values returned from the cache are shared, don't modify them
+            in place, assign a new value instead.
+
+        the decoded part can be limited, the payload of the last layer
+            decoded is then kept as raw Bits:
+
+            Ethernet.frombytes(frame, stop_at=TCP, fields={"src_port", "dst_port"})
+
+        :param buffer: bytes-like object, memoryview, mmap or Bits
+        :param offset: bit offset of this package in `buffer`
+        :param max_depth: number of layers decoded as models, this one included
+        :param stop_at: model (or tuple of models) whose payload isn't decoded
+        :param fields: names of the fields which will be used, variable fields
+            of any layer not listed here are not copied out of a read-only
+            buffer such as bytes until one of them is set
+        """
+        return cls(_blank_init=True)._decode(Bits.frombuffer(buffer), offset, drop_payload, parent, lazy,
+                                             limits=cls._decode_limits(max_depth, stop_at, fields))
+
+    @staticmethod
+    def _decode_limits(max_depth, stop_at, fields):
+        """:return: (max_depth, stop_at, fields) passed down the layers, or None without limits"""
+        if max_depth is None and stop_at is None and fields is None:
+            return None
+        if max_depth is not None and max_depth < 1:
+            raise ValueError("max_depth must be at least 1, got {}".format(max_depth))
+        if fields is not None:
+            fields = frozenset(fields)
+        return max_depth, stop_at, fields
+
+    def decode_into(self, buffer, offset=0, drop_payload=False, parent=None, lazy=False,
+                    max_depth=None, stop_at=None, fields=None):
+        """
+        decode from `buffer` into this existing package, like `frombuffer`
+
+        the payload chain is decoded into as well, as long as the payload
+            types stay the same, so a receive loop decoding frames of
+            the same kind into one package allocates no new models.
+            any previous value, payload or layer of this package
+            must not be used anymore.
+
+        :return: self
+        """
+        return self._redecode(Bits.frombuffer(buffer), offset, drop_payload, parent, lazy,
+                              self._decode_limits(max_depth, stop_at, fields))
+
+    def _redecode(self, bits, offset, drop_payload, parent, lazy, limits=None):
+        """reset a decoded package, then `_decode` into it"""
+        if self._payload_lazy:
+            reuse = None
+        else:
+            reuse = self._payload
+        self._cache = None
+        self._source = None
+        self._checksum_auto = False
+        return self._decode(bits, offset, drop_payload, parent, lazy, reuse, limits)
+
+    def _decode(self, bits, offset, drop_payload, parent, lazy, reuse=None, limits=None):
+        """work of `frombuffer` and `decode_into`, on a blank or reset package"""
+        self.parent = parent
+        end = offset + self.solid_length
+        owned = self._owned_solid
+        if owned is not None and self.solid_data is not owned:
+            # replaced since, the new one may not be ours to write to
+            owned = None
+        self.solid_data = self._owned_solid = _copy_into(owned, bits, offset, end)
+
+        stop = False
+        fields = None
+        if limits is not None:
+            max_depth, stop_at, fields = limits
+            if max_depth is not None:
+                stop = max_depth == 1
+                limits = (max_depth - 1, stop_at, fields)
+            if stop_at is not None and isinstance(self, stop_at):
+                stop = True
+
+        if self.variable_fields:
+            owned = self._owned_variable
+            if owned is not None and self.variable_data is not owned:
+                owned = None
+            self._locate_variable_fields()
+            if fields is not None and bits.readonly and fields.isdisjoint(self.variable_fields):
+                # shares the buffer, copied by the first write, see `FieldBase.write`
+                self.variable_data = bits.window(end, end + self.variable_length)
+                self._owned_variable = None
+            else:
+                self.variable_data = self._owned_variable = _copy_into(
+                    owned, bits, end, end + self.variable_length)
+            end += self.variable_length
+        else:
+            self._var_layout = _EMPTY_LAYOUT
+            self.variable_data = _EMPTY_BITS
+        if lazy:
+            self._cache = {}
+        if drop_payload:
+            self._payload = Bits()
+            self._payload_lazy = False
+            self._payload_shared = False
+        elif stop:
+            self._payload = bits.window(end)
+            self._payload_lazy = False
+            self._payload_shared = True
+        elif lazy:
+            self._payload = bits
+            self._payload_lazy_offset = end
+            self._payload_lazy = True
+            self._payload_shared = False
+            self._limits = limits
+        else:
+            self._payload_lazy = False
+            self._payload = self._dispatch_payload(bits, end, reuse=reuse, limits=limits)
+        if self._checksum_fields:
+            self._checksum_auto = True
+        if not drop_payload and bits.readonly:
+            # only immutable buffers are tracked: a writable one may be
+            #   reused by the caller while this package is still alive
+            self._source = bits
+            self._source_offset = offset
+        return self
 
     def payload_type(self):
-        return None
+        """
+        type decoding the payload: a model, a callable(payload_bits, parent=self),
+            or None to keep the payload as Bits
+
+        by default it is looked up in `payload_types` by the value
+            of the `payload_key` field, when the model declares them:
+
+            class Ethernet(Model):
+                type = IntField(16)
+                payload_key = "type"
+                payload_types = {0x0800: IP}
+        """
+        if self._demux is None:
+            return None
+        return self._demux.get(getattr(self, self.payload_key), _NO_PAYLOAD)[0]
+
+    @classmethod
+    def register_payload(cls, key, payload_type):
+        """
+        add or replace an entry of the `payload_types` table at runtime,
+            e.g. `IP.register_payload(17, UDP)`
+        """
+        if cls._demux is None:
+            raise ValueError("{} has no payload_key".format(cls.__name__))
+        cls.payload_types[key] = payload_type
+        cls._demux[key] = MetaPackage.demux_entry(payload_type)
+
+    @classmethod
+    def header_bits(cls, buffer, offset=0):
+        """
+        length in bits of the solid and variable part of the package
+            starting at bit `offset` of `buffer`,
+            or None if `buffer` is too short to contain the solid part
+        """
+        bits = Bits.frombuffer(buffer)
+        if len(bits) - offset < cls.solid_length:
+            return None
+        if not cls.variable_fields:
+            return cls.solid_length
+        c = cls(_blank_init=True)
+        c.solid_data = bits[offset:offset + cls.solid_length]
+        c._locate_variable_fields()
+        return cls.solid_length + c.variable_length
+
+    @classmethod
+    def iter_decode(cls, source, chunk_size=None, lazy=False, max_record_size=None):
+        """
+        yield consecutive records decoded from a buffer, file, socket
+            or iterable of chunks, see `obm.stream.iter_decode`
+        """
+        from .stream import iter_decode, DEFAULT_CHUNK_SIZE
+        return iter_decode(cls, source, chunk_size or DEFAULT_CHUNK_SIZE,
+                           lazy=lazy, max_record_size=max_record_size)
+
+    @classmethod
+    def template(cls, **defaults):
+        """
+        encode a prototype once, to create many similar packages quickly,
+            see `obm.template.Template`
+
+        :rtype: obm.template.Template
+        """
+        from .template import Template
+        return Template(cls, **defaults)
+
+    @classmethod
+    def compile_filter(cls, expression):
+        """
+        compile a predicate evaluated on raw bytes, to skip packages
+            without decoding them, see `obm.filters.compile_filter`
+
+        >>> match = Ethernet.compile_filter("payload.protocol == 6 and payload.payload.dst_port == 80")
+        >>> match(frame)
+        """
+        from .filters import compile_filter
+        return compile_filter(cls, expression)
+
+    @classmethod
+    def unpack(cls, data, offset=0) -> tuple:
+        """
+        decode the solid fields from raw bytes without creating an instance
+
+        :param data: bytes-like object, starting with the solid part
+        :param offset: byte offset of the solid part in `data`
+        :return: values of `solid_fields`, in definition order
+        """
+        return cls._codec.decode(data, offset)
+
+    @classmethod
+    def pack(cls, **kwargs) -> bytes:
+        """
+        encode the solid fields to raw bytes without creating an instance,
+            missing fields are filled with their default value
+        """
+        return cls._codec.encode([
+            kwargs.get(fname, field.default)
+            for fname, field in cls.solid_fields.items()
+        ])
+
+    @classmethod
+    def decode_array(cls, records, record_size=None):
+        """
+        columnar decode of fixed-size records, requires numpy,
+            see `obm.batch.decode_array`
+        """
+        from .batch import decode_array
+        return decode_array(cls, records, record_size)
+
+    @classmethod
+    def decode_many(cls, buffers):
+        """
+        columnar decode of the solid part of many buffers, requires numpy,
+            see `obm.batch.decode_many`
+        """
+        from .batch import decode_many
+        return decode_many(cls, buffers)
+
+    @classmethod
+    def encode_many(cls, count=None, **columns) -> bytearray:
+        """
+        encode many packages from per-field columns into one buffer,
+            requires numpy, see `obm.batch.encode_many`
+        """
+        from .batch import encode_many
+        return encode_many(cls, count, **columns)
+
+    def solid_values(self) -> tuple:
+        """values of all solid fields, decoded in one pass"""
+        if len(self.solid_data) != self.solid_length:
+            # decoded from a truncated buffer, the codec expects a whole solid part
+            return tuple(getattr(self, name) for name in self.solid_fields)
+        if self.byte_aligned:
+            # struct reads the buffer of solid_data itself
+            return self._codec.decode(self.solid_data)
+        return self._codec.decode(bytes(self.solid_data))
 
     @property
     def header_data(self):
@@ -147,11 +739,12 @@ class PackageBase(metaclass=MetaPackage):
         return cls.frombytes(bytes.fromhex(hex_str), drop_payload=drop_payload, parent=parent)
 
     def __repr__(self):
+        values = dict(zip(self.solid_fields, self.solid_values()))
         return "{}<{} #payload: {}>".format(
             self.__class__.__name__,
             " ".join(
-                "{}={}".format(k, getattr(self, k))
+                "{}={}".format(k, values[k] if k in values else getattr(self, k))
                 for k in self.fields
             ),
-            self.payload
+            self.payload_view
         )
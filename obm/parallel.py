@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+decoding of large record files on several cores
+
+the file is split into chunks of whole records, each worker process maps
+    the file itself and decodes its chunks from the mapping, so no raw
+    data is sent between processes, only the results.
+
+records of fixed-size models are located by offset arithmetic. the
+    boundaries of variable-length records are found by the workers when
+    a `sync` function can tell where the next record starts, otherwise
+    by the calling process in one pass over the record headers.
+
+models and functions given here are sent to the workers by reference,
+    they must be importable: defined at module level, not in a function
+    or in `__main__` under the spawn start method
+"""
+import os
+import mmap
+import concurrent.futures
+from .datastruct import Bits
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _map(path):
+    """:return: read-only mapping of the file at `path`"""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def record_size(model):
+    """
+    :type model: type[obm.model_base.PackageBase]
+    :return: size in bytes of the records of a fixed-layout model,
+        or None if the model has variable fields
+    """
+    if model.variable_fields:
+        return None
+    if not model.solid_length or model.solid_length % 8:
+        raise ValueError("{} is {} bits long, records must be whole bytes".format(
+            model.__name__, model.solid_length))
+    return model.solid_length // 8
+
+
+def _close(mapping):
+    try:
+        mapping.close()
+    except BufferError:
+        # records still use it (e.g. in a traceback),
+        #   it is unmapped when they are garbage collected
+        pass
+
+
+def _iter_records(model, buffer, start, end, lazy=False, record_length=None, reuse=False):
+    """
+    yield (byte offset, size in bytes, record) of the consecutive records
+        of `buffer` from byte `start` on, up to the first one starting at or after `end`
+
+    :param record_length: see `decode_file`
+    :param reuse: decode every record into the same package, lazily
+        and without payload, when only the sizes are used
+    """
+    bits = Bits.frombuffer(buffer)
+    view = memoryview(buffer) if record_length is not None else None
+    total = len(buffer)
+    header = model(_blank_init=True) if reuse else None
+    position = start
+    while position < end:
+        if (total - position) * 8 < model.solid_length:
+            raise ValueError("truncated {} record at byte {}".format(model.__name__, position))
+        if header is not None:
+            record = header.decode_into(bits, position * 8, drop_payload=True, lazy=True)
+        else:
+            record = model.frombuffer(bits, position * 8, drop_payload=True,
+                                      lazy=lazy or record_length is not None)
+        if record_length is None:
+            length = record.solid_length + record.variable_length
+            if not length or length % 8:
+                raise ValueError("{} record of {} bits at byte {} can not be framed in bytes".format(
+                    model.__name__, length, position))
+            size = length // 8
+        else:
+            size = record_length(record)
+            if size < 1:
+                raise ValueError("{} record of {} bytes at byte {}".format(model.__name__, size, position))
+        if position + size > total:
+            raise ValueError("truncated {} record at byte {}".format(model.__name__, position))
+        if record_length is not None and header is None:
+            # decoded again with its payload, which ends with the record
+            record = model.frombuffer(view[position:position + size], lazy=lazy)
+        yield position, size, record
+        position += size
+
+
+def chunk_bounds(buffer, model, offset=0, chunk_size=DEFAULT_CHUNK_SIZE, record_length=None):
+    """
+    split `buffer` into chunks of consecutive whole records
+
+    records of fixed-layout models are located by offset arithmetic,
+        others by reading every record header
+
+    :param offset: byte offset of the first record
+    :param record_length: see `decode_file`
+    :return: list of (start, end) byte offsets
+    """
+    total = len(buffer)
+    size = record_size(model) if record_length is None else None
+    if size is not None:
+        if (total - offset) % size:
+            raise ValueError("truncated {} record at byte {}".format(
+                model.__name__, total - (total - offset) % size))
+        step = max(1, chunk_size // size) * size
+        return [(start, min(start + step, total)) for start in range(offset, total, step)]
+
+    bounds = []
+    start = position = offset
+    for position, size, _ in _iter_records(model, buffer, offset, total, record_length=record_length, reuse=True):
+        position += size
+        if position - start >= chunk_size:
+            bounds.append((start, position))
+            start = position
+    if start < position:
+        bounds.append((start, position))
+    return bounds
+
+
+def _decode_chunk(task):
+    """
+    worker: decode the records of one chunk and apply `func` to them
+
+    :return: (byte offset of the first record or None, end of the last record, results)
+    """
+    path, model, start, end, func, lazy, sync, record_length = task
+    mapping = _map(path)
+    try:
+        if sync is not None:
+            start = sync(mapping, start)
+            if start is None or start >= end:
+                return None, None, []
+        results = []
+        stop = start
+        for position, size, record in _iter_records(model, mapping, start, end, lazy, record_length):
+            results.append(func(record))
+            stop = position + size
+        record = None  # the last one holds a view of the mapping
+        return start, stop, results
+    finally:
+        _close(mapping)
+
+
+def _decode_chunk_columns(task):
+    """worker: columnar decode of one chunk of fixed-size records"""
+    from .batch import decode_array
+    from .utils import _import_numpy
+    path, model, start, end, size = task
+    np = _import_numpy()
+    mapping = _map(path)
+    try:
+        return decode_array(model, np.frombuffer(mapping, dtype=np.uint8, count=end - start, offset=start), size)
+    finally:
+        _close(mapping)
+
+
+def _run(worker, tasks, workers):
+    if workers == 1 or len(tasks) <= 1:
+        return [worker(task) for task in tasks]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(worker, tasks))
+
+
+def _tasks(path, model, offset, chunk_size, record_length=None):
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return []
+    mapping = _map(path)
+    try:
+        return chunk_bounds(mapping, model, offset, chunk_size, record_length)
+    finally:
+        _close(mapping)
+
+
+def decode_file(path, model, func, workers=None, offset=0, chunk_size=DEFAULT_CHUNK_SIZE, lazy=False,
+                sync=None, record_length=None):
+    """
+    decode the consecutive records of `model` stored in a file,
+        and apply `func` to each of them in worker processes
+
+    >>> def five_tuple(record):
+    ...     return record.src_ip, record.dst_ip, record.protocol
+    >>> tuples = decode_file("headers.bin", IP, five_tuple, workers=8)
+
+    a record is the solid and variable part of `model`, unless
+        `record_length` is given: records then include their payload,
+        e.g. the frame following the record header of a capture file
+
+    >>> def record_length(record):
+    ...     return 16 + record.captured_length
+    >>> ports = decode_file("frames.cap", CaptureRecord, tcp_ports, record_length=record_length)
+
+    records are decoded like `obm.stream.iter_decode` does, they share
+        memory with the mapping of the worker and can't be sent back,
+        `func` must return plain (picklable) values instead
+
+    :type model: type[obm.model_base.PackageBase]
+    :param func: callable(record) -> result, at module level
+    :param workers: number of processes, default: one per CPU,
+        1 decodes in the calling process
+    :param offset: byte offset of the first record, e.g. to skip a file header
+    :param chunk_size: approximate size in bytes of the chunks given to workers
+    :param sync: callable(mapping, start) -> byte offset of the first record
+        starting at or after byte `start`, or None if there is none, at module level.
+        with it, each worker finds where its chunk starts by itself
+        instead of the calling process reading every record header first
+    :param record_length: callable(record) -> size in bytes of the whole
+        record, payload included, at module level. it is given the record
+        decoded lazily without its payload, which is decoded afterwards
+    :return: list of the results, in file order
+    """
+    with open(path, "rb") as f:
+        total = os.fstat(f.fileno()).st_size
+    if sync is None or record_size(model) is not None and record_length is None:
+        bounds = _tasks(path, model, offset, chunk_size, record_length)
+        sync = None
+    else:
+        bounds = [(start, min(start + chunk_size, total)) for start in range(offset, total, chunk_size)]
+    tasks = [(path, model, start, end, func, lazy, sync if start != offset else None, record_length)
+             for start, end in bounds]
+
+    results = []
+    position = offset
+    for first, end, chunk in _run(_decode_chunk, tasks, workers):
+        if first is None:
+            continue
+        if first != position:
+            # sync found no record boundary, or the wrong one
+            raise ValueError("chunk synchronized at byte {}, the previous record ends at byte {}".format(
+                first, position))
+        position = end
+        results.extend(chunk)
+    if bounds and position != total:
+        raise ValueError("no record found after byte {}".format(position))
+    return results
+
+
+def decode_file_columns(path, model, workers=None, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    columnar decode of a file of fixed-size records in worker processes,
+        requires numpy, see `obm.batch.decode_array`
+
+    :type model: type[obm.model_base.PackageBase]
+    :return: OrderedDict of field name -> numpy array, in file order
+    """
+    from .batch import decode_array
+    from .utils import _import_numpy
+    np = _import_numpy()
+    size = record_size(model)
+    if size is None:
+        raise ValueError("{} has variable fields, records must be fixed-size".format(model.__name__))
+
+    tasks = [(path, model, start, end, size)
+             for start, end in _tasks(path, model, offset, chunk_size)]
+    chunks = _run(_decode_chunk_columns, tasks, workers)
+    if not chunks:
+        return decode_array(model, np.zeros((0, size), dtype=np.uint8))
+    columns = chunks[0]
+    for name in columns:
+        columns[name] = np.concatenate([chunk[name] for chunk in chunks])
+    return columns
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+reuse of decoded packages in receive loops
+"""
+
+
+class Pool:
+    """
+    free-list of packages of one model, decoded into again and again
+        instead of creating new ones, see `PackageBase.decode_into`
+
+    >>> pool = Pool(Ethernet)
+    >>> for frame in frames:
+    ...     ethernet = pool.decode(frame)
+    ...     handle(ethernet)
+    ...     pool.release(ethernet)
+
+    released packages keep their payload chain, which is reused by the
+        next decode as long as the payload types are the same.
+        a released package, or anything taken from it, must not be used anymore.
+    """
+
+    def __init__(self, model, max_size=64):
+        """
+        :type model: type[obm.model_base.PackageBase]
+        :param max_size: number of free packages kept at most
+        """
+        self.model = model
+        self.max_size = max_size
+        self._free = []
+
+    def __len__(self):
+        """number of free packages"""
+        return len(self._free)
+
+    def acquire(self):
+        """
+        :return: a free package, to be decoded into
+        :rtype: obm.model_base.PackageBase
+        """
+        if self._free:
+            return self._free.pop()
+        return self.model(_blank_init=True)
+
+    def decode(self, buffer, offset=0, drop_payload=False, parent=None, lazy=False, **limits):
+        """
+        decode `buffer` into a free package, see `PackageBase.frombuffer`
+
+        :rtype: obm.model_base.PackageBase
+        """
+        return self.acquire().decode_into(buffer, offset, drop_payload, parent, lazy, **limits)
+
+    def release(self, package):
+        """give `package` back to the pool, once it is not used anymore"""
+        if type(package) is not self.model:
+            raise ValueError("{} can not be released into a pool of {}".format(
+                type(package).__name__, self.model.__name__))
+        if len(self._free) < self.max_size:
+            self._free.append(package)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+random access to files made of fixed-size records, through mmap
+"""
+import mmap
+import os
+from .datastruct import Bits
+
+
+class RecordFile:
+    """
+    a file of consecutive records of a fixed-layout model
+        (without variable fields), mapped into memory
+
+    record `i` is located by offset arithmetic, nothing is read until
+        its fields are accessed. records share memory with the mapping,
+        so with `writable=True` setting a field writes straight to the file.
+
+    >>> with RecordFile("log.bin", Entry, writable=True) as records:
+    ...     records[1000].status = 2
+    ...     print(len(records), records[-1])
+
+    records hold a view of the mapping: if some are still referenced
+        by `close()`, the mapping is released when the last of them is
+        garbage collected
+    """
+
+    def __init__(self, path, model, writable=False, offset=0):
+        """
+        :type model: type[obm.model_base.PackageBase]
+        :param path: file path or a file object opened in binary mode
+        :param offset: byte offset of the first record, e.g. to skip a file header
+        """
+        if model.variable_fields:
+            raise ValueError("{} has variable fields, records must be fixed-size".format(model.__name__))
+        if not model.solid_length or model.solid_length % 8:
+            raise ValueError("{} is {} bits long, records must be whole bytes".format(
+                model.__name__, model.solid_length))
+
+        self.model = model
+        self.writable = writable
+        self.offset = offset
+        self.record_size = model.solid_length // 8
+
+        if hasattr(path, "fileno"):
+            self._file = None
+            fileno = path.fileno()
+        else:
+            self._file = open(path, "r+b" if writable else "rb")
+            fileno = self._file.fileno()
+        if os.fstat(fileno).st_size:
+            self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+        else:
+            # an empty file can't be mapped, it has no records anyway
+            self._mmap = None
+            self._view = memoryview(b"")
+
+    def __len__(self):
+        return (len(self._view) - self.offset) // self.record_size
+
+    def _position(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("record index out of range")
+        return self.offset + index * self.record_size
+
+    def __getitem__(self, index):
+        """
+        :rtype: obm.model_base.PackageBase
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        start = self._position(index)
+        c = self.model(_blank_init=True)
+        c.solid_data = Bits(buffer=self._view[start:start + self.record_size])
+        c.variable_data = Bits()
+        c._checksum_auto = bool(c._checksum_fields)
+        return c
+
+    def __setitem__(self, index, value):
+        """replace a whole record by a model or its raw bytes"""
+        start = self._position(index)
+        data = bytes(value)
+        if len(data) != self.record_size:
+            raise ValueError("record must be {} bytes, got {}".format(self.record_size, len(data)))
+        self._view[start:start + self.record_size] = data
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def raw(self, index) -> memoryview:
+        """raw bytes of record `index`, sharing memory with the mapping"""
+        start = self._position(index)
+        return self._view[start:start + self.record_size]
+
+    def decode_array(self):
+        """
+        columnar decode of all records, requires numpy,
+            see `obm.batch.decode_array`
+        """
+        from .batch import decode_array
+        from .utils import _import_numpy
+        np = _import_numpy()
+        records = np.frombuffer(self._view, dtype=np.uint8, count=len(self) * self.record_size,
+                                offset=self.offset)
+        return decode_array(self.model, records, self.record_size)
+
+    def flush(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self):
+        self._view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # records or columns still use the mapping,
+                #   it is unmapped when they are garbage collected
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+decoding of consecutive records from buffers, files and sockets
+
+a record is the solid part plus the variable part of a model, its payload
+    (if any) is not part of the record, so models used here are expected
+    to describe the whole record with their fields, e.g.:
+
+    class Message(Model):
+        length = IntField(16)
+        body = BytesField(lambda self: self.length * 8)
+"""
+import mmap
+import bitarray
+from .datastruct import Bits
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamDecoder:
+    """
+    incremental decoder, feed it with data in arbitrary pieces
+        and get complete records back
+
+    >>> decoder = StreamDecoder(Message)
+    >>> for chunk in chunks:
+    ...     for message in decoder.feed(chunk):
+    ...         handle(message)
+
+    only the incomplete tail of the input is kept between feeds,
+        `max_record_size` (in bytes) bounds it against bogus length fields
+    """
+
+    def __init__(self, model, lazy=False, max_record_size=None):
+        """
+        :type model: type[obm.model_base.PackageBase]
+        """
+        self.model = model
+        self.lazy = lazy
+        self.max_record_size = max_record_size
+        self._buffer = bytearray()
+        self._next_size = None
+
+    @property
+    def pending(self) -> int:
+        """number of buffered bytes not yet decoded"""
+        return len(self._buffer)
+
+    def record_size(self, buffer, offset=0):
+        """
+        size in bytes of the record starting at byte `offset` of `buffer`,
+            or None if there is not enough data to know it yet
+        """
+        bits = self.model.header_bits(buffer, offset * 8)
+        if bits is None:
+            return None
+        if bits % 8 or not bits:
+            raise ValueError("{} record of {} bits can not be framed in bytes".format(
+                self.model.__name__, bits))
+        size = bits // 8
+        if self.max_record_size is not None and size > self.max_record_size:
+            raise ValueError("{} record of {} bytes exceeds max_record_size {}".format(
+                self.model.__name__, size, self.max_record_size))
+        return size
+
+    def feed(self, data) -> list:
+        """
+        append `data` to the internal buffer and decode all complete records
+
+        :return: decoded models, possibly empty
+        """
+        buff = self._buffer
+        buff += data
+        result = []
+        offset = 0
+        while True:
+            size = self._next_size
+            if size is None:
+                size = self._next_size = self.record_size(buff, offset)
+                if size is None:
+                    break
+            if len(buff) - offset < size:
+                break
+            # the record is copied out, as the buffer will be reused
+            record = bytes(buff[offset:offset + size])
+            result.append(self.model.frombuffer(record, drop_payload=True, lazy=self.lazy))
+            offset += size
+            self._next_size = None
+        if offset:
+            del buff[:offset]
+        return result
+
+    def close(self):
+        """
+        signal the end of input
+
+        :raises ValueError: if an incomplete record is left in the buffer
+        """
+        if self._buffer:
+            raise ValueError("truncated {} record, {} bytes left".format(
+                self.model.__name__, len(self._buffer)))
+
+
+def iter_buffer(model, buffer, lazy=False):
+    """
+    yield consecutive records of a complete in-memory buffer,
+        decoded in place without copying `buffer` as a whole:
+        the fields of each record are copied out of it, so the
+        records stay valid when `buffer` is modified or reused
+    """
+    bits = Bits.frombuffer(buffer)
+    offset = 0
+    total = len(bits)
+    while offset < total:
+        length = model.header_bits(bits, offset)
+        if length is None or offset + length > total:
+            raise ValueError("truncated {} record at bit {}".format(model.__name__, offset))
+        if not length:
+            raise ValueError("{} record of 0 bits".format(model.__name__))
+        yield model.frombuffer(bits, offset, drop_payload=True, lazy=lazy)
+        offset += length
+
+
+def iter_decode(model, source, chunk_size=DEFAULT_CHUNK_SIZE, lazy=False, max_record_size=None):
+    """
+    yield consecutive records of `model` decoded from `source`
+
+    :param source: a bytes-like object/mmap (decoded in place),
+        a file-like object with `read()`, a socket with `recv()`,
+        or an iterable of bytes chunks
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap, bitarray.bitarray)):
+        yield from iter_buffer(model, source, lazy=lazy)
+        return
+
+    if hasattr(source, "read"):
+        chunks = iter(lambda: source.read(chunk_size), b"")
+    elif hasattr(source, "recv"):
+        chunks = iter(lambda: source.recv(chunk_size), b"")
+    else:
+        chunks = source
+
+    decoder = StreamDecoder(model, lazy=lazy, max_record_size=max_record_size)
+    for chunk in chunks:
+        if not chunk:  # non-blocking streams may return None/empty
+            continue
+        yield from decoder.feed(chunk)
+    decoder.close()
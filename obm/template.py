@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+fast construction of many similar packages from a pre-encoded prototype
+"""
+from .datastruct import Bits
+
+
+class Template:
+    """
+    a model with some default values, encoded once
+
+    >>> syn = TCP.template(dst_port=80, syn=1, data_offset=5, window_size=8192)
+    >>> for port in range(1024, 2048):
+    ...     send(syn.new(src_port=port))
+
+    `new()` copies the pre-encoded header and only sets the fields
+        given to it, instead of encoding every field like `Model(...)`.
+        the variable fields are laid out once by the template, they are
+        laid out again only if an overridden field changes their lengths.
+    """
+
+    def __init__(self, model, **defaults):
+        """
+        :type model: type[obm.model_base.PackageBase]
+        """
+        self.model = model
+        self.defaults = defaults
+        prototype = model(**defaults)
+        self._solid_data = prototype.solid_data
+        self._variable_data = prototype.variable_data
+        self._var_layout = prototype._var_layout
+        # each variable field with the value it was encoded from
+        self._variable_values = [
+            (fname, defaults.get(fname, field.default))
+            for fname, field in model.variable_fields.items()
+        ]
+
+    def new(self, payload=None, parent=None, **overrides):
+        """
+        :return: a new package, with the template values except `overrides`
+        :rtype: obm.model_base.PackageBase
+        """
+        c = self.model(payload=payload, parent=parent, _blank_init=True)
+        c.solid_data = Bits(self._solid_data)
+        c.variable_data = Bits(self._variable_data)
+        c._var_layout = self._var_layout
+
+        if not overrides:
+            return c
+
+        variable = None
+        for fname, value in overrides.items():
+            field = c.fields.get(fname)
+            if field is None:
+                raise ValueError("{} has no field {!r}".format(self.model.__name__, fname))
+            if field.variable:
+                if variable is None:
+                    variable = {}
+                variable[fname] = value
+            else:
+                setattr(c, fname, value)
+
+        if c.variable_fields and self._layout_changed(c, overrides):
+            c.alloc_variable_fields()
+            for fname, value in self._variable_values:
+                if variable is None or fname not in variable:
+                    setattr(c, fname, value)
+
+        if variable is not None:
+            for fname, value in variable.items():
+                setattr(c, fname, value)
+        return c
+
+    __call__ = new
+
+    def _layout_changed(self, c, overrides) -> bool:
+        """whether the solid fields of `c` give other variable lengths than the template"""
+        layout = c._layout
+        if layout.cacheable:
+            if layout.dependencies.isdisjoint(overrides):
+                return False
+            return layout.resolve(c) != self._var_layout
+        return layout.compute(c) != self._var_layout
+
+    def __repr__(self):
+        return "Template<{} {}>".format(self.model.__name__, " ".join(
+            "{}={}".format(k, v) for k, v in self.defaults.items()
+        ))
@@ -1,7 +1,5 @@
 #!/usr/bin/env python3
 # coding=utf-8
-import struct
-import array
 import socket
 
 from .consts import *
@@ -11,24 +9,116 @@ def ceil8(num):
     return (num + 7) // 8 * 8
 
 
-if struct.pack("H", 1) == b"\x00\x01":  # big endian
-    def one_complement_checksum(pkt):
-        if len(pkt) % 2 == 1:
-            pkt += b"\x00"
-        s = sum(array.array("H", pkt))
-        s = (s >> 16) + (s & 0xffff)
-        s += s >> 16
-        s = ~s
-        return s & 0xffff
-else:
-    def one_complement_checksum(pkt):
-        if len(pkt) % 2 == 1:
-            pkt += b"\x00"
-        s = sum(array.array("H", pkt))
-        s = (s >> 16) + (s & 0xffff)
-        s += s >> 16
-        s = ~s
-        return (((s >> 8) & 0xff) | s << 8) & 0xffff
+# buffers from this size on are summed by numpy, when it is installed
+NUMPY_CHECKSUM_THRESHOLD = 2048
+
+_numpy = None
+
+
+def _import_numpy(required=True):
+    """
+    numpy is optional, only some features of obm require it
+
+    :param required: raise ImportError if numpy is not installed
+    :return: numpy, or None if it is not installed and not required
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    if _numpy is False:
+        if required:
+            raise ImportError("numpy is required for batch encoding/decoding, try `pip3 install numpy`")
+        return None
+    return _numpy
+
+
+def _byte_view(data) -> memoryview:
+    view = memoryview(data)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+def _ones_sum(view: memoryview) -> int:
+    """
+    16-bit one's complement sum of big-endian words, before folding
+        into 16 bits, an odd trailing byte is padded with zero
+
+    2**16 == 1 (mod 0xffff), so the sum of the words is congruent to
+        the whole buffer read as one big integer
+    """
+    if len(view) >= NUMPY_CHECKSUM_THRESHOLD:
+        np = _import_numpy(required=False)
+        if np is not None:
+            s = int(np.frombuffer(view, dtype=">u2", count=len(view) // 2).sum(dtype=np.uint64))
+            if len(view) % 2:
+                s += view[-1] << 8
+            return s
+    s = int.from_bytes(view, BYTE_ORDER)
+    if len(view) % 2:
+        s <<= 8
+    return s
+
+
+def _fold(s: int) -> int:
+    """fold a one's complement sum into 16 bits, keeping 0 only for a zero sum"""
+    r = s % 0xffff
+    if not r and s:
+        return 0xffff
+    return r
+
+
+def one_complement_checksum(pkt) -> int:
+    """
+    internet checksum (RFC 1071) of a bytes-like object, e.g. bytes,
+        bytearray, memoryview or mmap, which is not copied
+    """
+    return ~_fold(_ones_sum(_byte_view(pkt))) & 0xffff
+
+
+def one_complement_checksum_many(packets):
+    """
+    internet checksums of many packets in one call
+
+    :param packets: 2-D uint8 numpy array of fixed-size packets,
+        one per row, or an iterable of bytes-like objects
+    :return: uint16 numpy array for an array, list of int otherwise
+    """
+    np = _import_numpy(required=False)
+    if np is None or not isinstance(packets, np.ndarray):
+        return [one_complement_checksum(pkt) for pkt in packets]
+    if packets.ndim != 2 or packets.dtype != np.uint8:
+        raise ValueError("expecting a 2-D uint8 array, got {}-D {}".format(packets.ndim, packets.dtype))
+
+    size = packets.shape[1]
+    words = np.ascontiguousarray(packets[:, :size - size % 2]).view(">u2")
+    s = words.sum(axis=1, dtype=np.uint64)
+    if size % 2:
+        s += packets[:, -1].astype(np.uint64) << np.uint64(8)
+    r = s % np.uint64(0xffff)
+    r[(r == 0) & (s != 0)] = 0xffff
+    return (~r & np.uint64(0xffff)).astype(np.uint16)
+
+
+def one_complement_sum(data) -> int:
+    """folded 16-bit one's complement sum of big-endian words, `data` has even length"""
+    return _fold(_ones_sum(_byte_view(data)))
+
+
+def one_complement_update(checksum, old, new):
+    """
+    incrementally update a one's complement checksum after the covered
+        bytes `old` were replaced by `new`, per RFC 1624 eqn. 3:
+        HC' = ~(~HC + ~m + m')
+
+    `old` and `new` must have the same even length and start
+        at an even offset of the covered data
+    """
+    return ~_fold((~checksum & 0xffff) + (~one_complement_sum(old) & 0xffff) + one_complement_sum(new)) & 0xffff
 
 
 def ip2int(ip):
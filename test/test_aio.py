@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import asyncio
+import unittest
+from obm import Model, IntField, BytesField
+from obm.aio import ModelProtocol, read_model, iter_models, write_models
+
+
+class Message(Model):
+    kind = IntField(8)
+    length = IntField(16)
+    body = BytesField(lambda self: self.length * 8)
+
+
+def message(kind, body):
+    return Message(kind=kind, length=len(body), body=body)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+
+class TestModelProtocol(unittest.TestCase):
+    def feed(self, protocol, data, step):
+        for i in range(0, len(data), step):
+            chunk = data[i:i + step]
+            buffer = protocol.get_buffer(len(chunk))
+            buffer[:len(chunk)] = chunk
+            protocol.buffer_updated(len(chunk))
+
+    def test_framing(self):
+        messages = [message(i % 7, bytes([i]) * (i * 37 % 5000)) for i in range(50)]
+        data = b"".join(bytes(m) for m in messages)
+        for step in (1, 3, 1000, len(data)):
+            received = []
+            protocol = ModelProtocol(Message, on_message=received.append, buffer_size=16)
+            protocol.connection_made(FakeTransport())
+            self.feed(protocol, data, step)
+            self.assertEqual(protocol.pending, 0)
+            self.assertEqual([bytes(m) for m in received], [bytes(m) for m in messages])
+            protocol.eof_received()
+
+        protocol = ModelProtocol(Message)
+        self.feed(protocol, bytes(message(1, b"x" * 20))[:10], 10)
+        self.assertEqual(protocol.pending, 10)
+        with self.assertRaises(ValueError):
+            protocol.eof_received()
+
+        protocol = ModelProtocol(Message, max_record_size=100)
+        with self.assertRaises(ValueError):
+            self.feed(protocol, bytes(message(1, b"x" * 200)), 1000)
+
+    def test_send(self):
+        transport = FakeTransport()
+        protocol = ModelProtocol(Message)
+        protocol.connection_made(transport)
+        protocol.send(message(1, b"a"))
+        protocol.send(message(1, b"b"), message(2, b"cd"))
+        self.assertEqual(transport.written, [
+            bytes(message(1, b"a")), bytes(message(1, b"b")) + bytes(message(2, b"cd"))
+        ])
+
+    def test_drain(self):
+        async def main():
+            protocol = ModelProtocol(Message)
+            protocol.connection_made(FakeTransport())
+            await protocol.drain()
+            protocol.pause_writing()
+            drain = asyncio.ensure_future(protocol.drain())
+            await asyncio.sleep(0)
+            self.assertFalse(drain.done())
+            protocol.resume_writing()
+            await drain
+
+            protocol.pause_writing()
+            drain = asyncio.ensure_future(protocol.drain())
+            await asyncio.sleep(0)
+            protocol.connection_lost(None)
+            with self.assertRaises(ConnectionResetError):
+                await drain
+
+        asyncio.run(main())
+
+
+class Echo(ModelProtocol):
+    def __init__(self):
+        super().__init__(Message)
+
+    def message_received(self, received):
+        self.send(message(received.kind + 1, received.body))
+
+
+class TestStreams(unittest.TestCase):
+    def test_echo(self):
+        async def main():
+            loop = asyncio.get_running_loop()
+            server = await loop.create_server(Echo, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            sent = [message(i, b"x" * i * 100) for i in range(20)]
+            await write_models(writer, sent)
+            received = []
+            for _ in sent:
+                received.append(await read_model(reader, Message))
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+            return sent, received
+
+        sent, received = asyncio.run(main())
+        self.assertEqual([m.kind for m in received], [m.kind + 1 for m in sent])
+        self.assertEqual([m.body for m in received], [m.body for m in sent])
+
+    def test_iter_models(self):
+        async def main(data):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return [m async for m in iter_models(reader, Message)]
+
+        data = bytes(message(1, b"ab")) + bytes(message(2, b""))
+        self.assertEqual([(m.kind, m.body) for m in asyncio.run(main(data))], [(1, b"ab"), (2, b"")])
+        with self.assertRaises(ValueError):
+            asyncio.run(main(data[:-1]))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, BitsField
+from obm.datastruct import Bits
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Record(Model):
+    version = IntField(4, default=4)
+    flags = BitsField(3)
+    ttl = IntField(9)
+    src_ip = IntField(32)
+    wide = IntField(70)
+    reserved = IntField(42)
+
+
+class Celsius(IntField):
+    """stored with an offset of 40"""
+
+    def bits2py(self, bits):
+        return int(bits) - 40
+
+    def py2bits(self, value, length, instance=None, **kwargs):
+        return Bits.fromint(value + 40, length)
+
+
+class Reading(Model):
+    t = Celsius(8)
+    x = IntField(8)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestBatchDecode(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_byte_ips = [
+            bytes.fromhex("450000344712" "4000800627df" "c0a88501c0a8" "8580"),
+            bytes.fromhex("4500003c0559" "40004006438f" "c0a8b881c0a8" "b801"),
+        ]
+
+    def test_decode_many(self):
+        columns = IP.decode_many(self.raw_byte_ips + [self.raw_byte_ips[0] + b"payload"])
+        self.assertEqual(list(columns), list(IP.solid_fields))
+        for i, raw in enumerate(self.raw_byte_ips):
+            ip = IP.frombytes(raw)
+            for fname in IP.solid_fields:
+                if fname == "flags":
+                    self.assertEqual(columns[fname][i], int(ip.flags))
+                else:
+                    self.assertEqual(columns[fname][i], getattr(ip, fname))
+        self.assertEqual(columns["ttl"].dtype, numpy.uint8)
+        self.assertEqual(columns["src_ip"].dtype, numpy.uint32)
+        self.assertEqual(columns["ttl"].tolist(), [128, 64, 128])
+
+        self.assertRaises(ValueError, IP.decode_many, [b"\x45\x00"])
+
+    def test_decode_array(self):
+        raw = bytes.fromhex("005056c00001000c29ba674c0800") * 3
+        columns = Ethernet.decode_array(numpy.frombuffer(raw, dtype=numpy.uint8), record_size=14)
+        self.assertEqual(columns["type"].tolist(), [0x0800] * 3)
+        self.assertEqual(columns["dst_mac"].shape, (3, 6))
+        self.assertEqual(columns["src_mac"][2].tobytes(), bytes.fromhex("000c29ba674c"))
+
+        records = numpy.frombuffer(raw, dtype="V14")
+        self.assertEqual(Ethernet.decode_array(records)["type"].tolist(), [0x0800] * 3)
+
+    def test_decode_overridden_conversions(self):
+        columns = Reading.decode_many([b"\x3c\x01", b"\x3d\x02"])
+        self.assertEqual(columns["t"].tolist(), [20, 21])
+        self.assertEqual(columns["x"].tolist(), [1, 2])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestBatchEncode(unittest.TestCase):
+    def test_encode_many(self):
+        src_ips = [0xc0a88501, 0xc0a8b881, 0x0a000001]
+        buff = Record.encode_many(
+            src_ip=src_ips,
+            ttl=numpy.array([128, 64, 511], dtype=numpy.uint16),
+            flags="010",
+            wide=[1 << 69, 3, 0],
+        )
+        self.assertIsInstance(buff, bytearray)
+        self.assertEqual(len(buff), 20 * 3)
+        for i in range(3):
+            expected = Record(src_ip=src_ips[i], ttl=[128, 64, 511][i], flags="010",
+                              wide=[1 << 69, 3, 0][i])
+            self.assertEqual(buff[20 * i:20 * (i + 1)], bytes(expected))
+
+        columns = Record.decode_many([buff[:20], buff[40:]])
+        self.assertEqual(columns["version"].tolist(), [4, 4])
+        self.assertEqual(columns["ttl"].tolist(), [128, 511])
+        self.assertEqual(columns["wide"].tolist(), [1 << 69, 0])
+
+    def test_encode_bytes_column(self):
+        buff = Ethernet.encode_many(
+            count=2,
+            dst_mac=[bytes.fromhex("005056c00001"), bytes.fromhex("005056c00002")],
+            src_mac=bytes.fromhex("000c29ba674c"),
+            type=0x0800,
+        )
+        self.assertEqual(bytes(buff[:14]), bytes.fromhex("005056c00001000c29ba674c0800"))
+        self.assertEqual(bytes(buff[14:]), bytes.fromhex("005056c00002000c29ba674c0800"))
+        self.assertEqual(Ethernet.decode_array(numpy.frombuffer(buff, dtype=numpy.uint8),
+                                               record_size=14)["type"].tolist(), [0x0800] * 2)
+
+    def test_encode_overridden_conversions(self):
+        for t in ([20, 21], numpy.array([20, 21])):
+            buff = Reading.encode_many(t=t, x=[1, 2])
+            self.assertEqual(bytes(buff), b"\x3c\x01\x3d\x02")
+            self.assertEqual(bytes(buff[:2]), bytes(Reading(t=20, x=1)))
+        self.assertEqual(bytes(Reading.encode_many(count=2, t=20, x=1)), b"\x3c\x01" * 2)
+
+    def test_encode_variable_model(self):
+        from example.tcp import TCP
+        self.assertRaises(ValueError, TCP.encode_many, src_port=[1, 2])
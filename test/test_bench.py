@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from bench import run
+
+
+class TestBenchSuite(unittest.TestCase):
+    def test_smoke(self):
+        results = run.run(payload_sizes=(0,), min_time=0.0001, verbose=False)
+        self.assertIn("decode/0/ts_sack", results)
+        self.assertGreater(results["options/0/syn"]["pps"], 0)
+        self.assertFalse(run.compare(results, results, threshold=0.2))
+
+    def test_frame(self):
+        from example.ethernet import Ethernet
+        raw = run.build_frame(100, list(run.OPTION_SETS["syn"]))
+        tcp = Ethernet.frombytes(raw).payload.payload
+        self.assertEqual(len(bytes(tcp.payload)), 100)
+        self.assertEqual(tcp.data_offset, 8)
+        self.assertEqual(len(tcp.options), 6)
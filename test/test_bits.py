@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm.datastruct import Bits, FrozenBits
+
+
+class TestBits(unittest.TestCase):
+    def test_int_roundtrip(self):
+        for width in range(1, 65):
+            for value in (0, 1, (1 << width) - 1, (1 << width) // 3):
+                bits = Bits.fromint(value, width)
+                self.assertEqual(len(bits), width)
+                self.assertEqual(int(bits), value)
+                self.assertEqual(bits.to01(), bin(value)[2:].zfill(width))
+        self.assertEqual(int(Bits()), 0)
+        self.assertRaises(OverflowError, Bits.fromint, 1 << 16, 16)
+
+    def test_bool(self):
+        self.assertTrue(Bits("111"))
+        self.assertFalse(Bits("101"))
+        self.assertFalse(Bits(8))
+        self.assertTrue(Bits())
+
+    def test_new_is_zeroed(self):
+        self.assertEqual(Bits(13).to01(), "0" * 13)
+
+    def test_frozen(self):
+        key = FrozenBits(Bits.frombytes(b"\x08"))
+        self.assertEqual(hash(key), hash(Bits.frombytes(b"\x08")))
+        self.assertEqual({key: 1}[Bits.frombytes(b"\x08")], 1)
+        self.assertRaises(TypeError, key.append, 1)
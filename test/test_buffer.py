@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm.datastruct import Bits
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class TestBufferDecode(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        ) + b"helloworld"
+
+    def test_frombuffer_offset(self):
+        raw = b"\xff\xff" + self.raw_bytes_entire_frame
+        ethernet = Ethernet.frombuffer(memoryview(raw), offset=16)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+        self.assertIsInstance(ethernet.payload.payload, TCP)
+        self.assertEqual(ethernet.payload.payload.dst_port, 7777)
+
+        ip = IP.frombuffer(raw, offset=16 + 14 * 8)
+        self.assertEqual(bytes(ip), self.raw_bytes_entire_frame[14:])
+
+    def test_payload_shares_buffer(self):
+        buffer = bytearray(self.raw_bytes_entire_frame)
+        ethernet = Ethernet.frombuffer(buffer)
+        tcp = ethernet.payload.payload
+        self.assertEqual(bytes(tcp.payload_view), b"helloworld")
+
+        buffer[-10:] = b"HELLOWORLD"
+        self.assertEqual(bytes(tcp.payload_view), b"HELLOWORLD")
+
+        # .payload is a private copy
+        tcp.payload[0:8] = Bits.fromint(ord("h"), 8)
+        self.assertEqual(bytes(tcp.payload), b"hELLOWORLD")
+        self.assertEqual(buffer[-10:], b"HELLOWORLD")
+
+    def test_payload_copy_on_access(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        tcp = ethernet.payload.payload
+        self.assertTrue(tcp.payload_view.readonly)
+
+        # headers are private copies
+        tcp.dst_port = 80
+        self.assertEqual(tcp.dst_port, 80)
+        self.assertEqual(self.raw_bytes_entire_frame[36:38], b"\x1e\x61")
+
+        tcp.payload[0:8] = Bits.fromint(ord("H"), 8)
+        self.assertEqual(bytes(tcp.payload), b"Helloworld")
+        self.assertEqual(bytes(ethernet)[-10:], b"Helloworld")
+        self.assertEqual(bytes(tcp.payload_view), b"Helloworld")
+
+    def test_frombytes_copies_writable(self):
+        buffer = bytearray(self.raw_bytes_entire_frame)
+        for decode in (Ethernet.frombytes, lambda b: Ethernet.frombits(Bits.frombuffer(b))):
+            ethernet = decode(buffer)
+            # the caller may resize and reuse its buffer
+            buffer.extend(b"!")
+            del buffer[-1:]
+            buffer[-10:] = b"HELLOWORLD"
+            self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+            self.assertEqual(bytes(ethernet.payload.payload.payload_view), b"helloworld")
+            buffer[:] = self.raw_bytes_entire_frame
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import os
+import unittest
+from obm import Model, IntField, ChecksumField
+from obm.datastruct import Bits
+from obm import utils
+from obm.utils import one_complement_checksum, one_complement_checksum_many, one_complement_update
+from example.ethernet import Ethernet
+from example.tcp import TCP
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Header(Model):
+    kind = IntField(8)
+    flags = IntField(3)
+    level = IntField(5)
+    checksum = ChecksumField()
+    value = IntField(24)
+
+
+class TestChecksum(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        )
+
+    def assertValid(self, ethernet):
+        """incremental results must equal a full recompute"""
+        ip = ethernet.payload
+        tcp = ip.payload
+        ip_checksum, tcp_checksum = ip.checksum, tcp.checksum
+        ip.fill_checksum()
+        tcp.fill_checksum()
+        self.assertEqual(ip.checksum, ip_checksum)
+        self.assertEqual(tcp.checksum, tcp_checksum)
+
+    def test_update(self):
+        self.assertEqual(one_complement_update(0xdd2f, b"\x55\x55", b"\x32\x85"), 0x0000)
+        data = bytearray(b"\x45\x00\x00\x34\x47\x12\x40\x00\x80\x06\x00\x00")
+        checksum = one_complement_checksum(bytes(data))
+        data[8:10] = b"\x3f\x06"
+        self.assertEqual(one_complement_update(checksum, b"\x80\x06", b"\x3f\x06"),
+                         one_complement_checksum(bytes(data)))
+
+    def test_header_fields(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        ip.ttl -= 1
+        self.assertEqual(ip.checksum, 0x28df)
+        ip.flags = "000"
+        ip.identification = 0x1234
+        self.assertValid(ethernet)
+
+        tcp = ip.payload
+        tcp.dst_port = 80
+        tcp.psh = 1
+        options = tcp.options
+        options[0] = TCP.OptionMaxSegmentSize(value=1400)
+        tcp.options = options
+        self.assertValid(ethernet)
+
+        raw = bytes(ethernet)
+        self.assertEqual(raw, bytes(Ethernet.frombytes(raw)))
+
+    def test_pseudo_header(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        tcp_checksum = ip.payload.checksum
+        ip.src_ip = 0x0a000001
+        self.assertNotEqual(ip.payload.checksum, tcp_checksum)
+        self.assertValid(ethernet)
+
+        lazy = Ethernet.frombytes(self.raw_bytes_entire_frame, lazy=True)
+        lazy.payload.dst_ip = 0x0a000002
+        self.assertValid(lazy)
+
+    def test_payload(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        tcp = ethernet.payload.payload
+        tcp.payload = Bits.frombytes(b"bye")
+        self.assertValid(ethernet)
+
+    def test_without_parent(self):
+        tcp = TCP.frombytes(self.raw_bytes_entire_frame[34:])
+        checksum = tcp.checksum
+        # the pseudo-header is unknown, the checksum is left alone
+        tcp.payload = Bits.frombytes(b"x")
+        self.assertEqual(tcp.checksum, checksum)
+        tcp.fill_checksum()
+        self.assertEqual(tcp.checksum, checksum)
+        # but still updated by header writes
+        tcp.dst_port = 80
+        self.assertEqual(tcp.checksum, one_complement_update(checksum, b"\x1e\x61", b"\x00\x50"))
+
+    def test_lazy_payload(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, lazy=True)
+        ip = ethernet.payload
+        ip.ttl = 1
+        # the TCP pseudo-header doesn't use ttl, the payload stays undecoded
+        self.assertTrue(ip._payload_lazy)
+        ip.src_ip = 0x0a000001
+        self.assertFalse(ip._payload_lazy)
+        self.assertValid(ethernet)
+
+    def test_explicit(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        ip.checksum = 0x1234
+        ip.ttl = 1
+        self.assertNotEqual(ip.checksum, 0x1234)
+
+        # constructed packages are left alone until filled
+        header = Header(kind=1, checksum=0x1234)
+        header.value = 7
+        self.assertEqual(header.checksum, 0x1234)
+        header.fields["checksum"].fill(header)
+        header.level = 3
+        header.value = 0xabcdef
+        checksum = header.checksum
+        header.fields["checksum"].fill(header)
+        self.assertEqual(header.checksum, checksum)
+
+    def test_not_aligned(self):
+        header = Header.frombytes(Header.pack(kind=1, level=2, value=3))
+        header.fields["checksum"].fill(header)
+        header.flags = 5
+        header.value = 0x123456
+        checksum = header.checksum
+        header.fields["checksum"].fill(header)
+        self.assertEqual(header.checksum, checksum)
+
+
+def reference_checksum(data):
+    data = bytes(data)
+    if len(data) % 2:
+        data += b"\x00"
+    s = sum(int.from_bytes(data[i:i + 2], "big") for i in range(0, len(data), 2))
+    while s >> 16:
+        s = (s >> 16) + (s & 0xffff)
+    return ~s & 0xffff
+
+
+class TestChecksumFunctions(unittest.TestCase):
+    def test_lengths(self):
+        for length in (0, 1, 2, 3, 20, 59, 1500, 4095, 9000, 65537):
+            data = os.urandom(length)
+            expected = reference_checksum(data)
+            self.assertEqual(one_complement_checksum(data), expected, length)
+            self.assertEqual(one_complement_checksum(bytearray(data)), expected, length)
+            self.assertEqual(one_complement_checksum(memoryview(data)[0:]), expected, length)
+
+        self.assertEqual(one_complement_checksum(b"\x00" * 20), 0xffff)
+        self.assertEqual(one_complement_checksum(b"\xff" * 4000), 0x0000)
+        self.assertEqual(one_complement_checksum(Bits.frombytes(b"\x45\x00")), 0xbaff)
+
+    def test_without_numpy(self):
+        threshold = utils.NUMPY_CHECKSUM_THRESHOLD
+        utils.NUMPY_CHECKSUM_THRESHOLD = float("inf")
+        try:
+            data = os.urandom(9001)
+            self.assertEqual(one_complement_checksum(data), reference_checksum(data))
+            self.assertEqual(one_complement_checksum_many([data, data[:20]]),
+                             [reference_checksum(data), reference_checksum(data[:20])])
+        finally:
+            utils.NUMPY_CHECKSUM_THRESHOLD = threshold
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_many(self):
+        np = numpy
+        for size in (20, 21):
+            packets = np.frombuffer(os.urandom(size * 50), dtype=np.uint8).reshape(-1, size)
+            checksums = one_complement_checksum_many(packets)
+            self.assertEqual(checksums.dtype, np.uint16)
+            self.assertEqual(list(checksums), [reference_checksum(row.tobytes()) for row in packets])
+
+        packets = np.zeros((2, 4), dtype=np.uint8)
+        packets[1] = 0xff
+        self.assertEqual(list(one_complement_checksum_many(packets)), [0xffff, 0x0000])
+        self.assertEqual(one_complement_checksum_many([b"\x45\x00", b"\x01"]), [0xbaff, 0xfeff])
+        with self.assertRaises(ValueError):
+            one_complement_checksum_many(np.zeros(4, dtype=np.uint8))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, BytesField
+from obm.datastruct import Bits
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class TestSolidCodec(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_byte_ethernet = bytes.fromhex("000c29ba6742" "005056c00008" "0800")
+        self.raw_byte_ip = bytes.fromhex(
+            "450000344712" "4000800627df"
+            "c0a88501c0a8" "8580"
+        )
+
+    def test_codec_kind(self):
+        self.assertIsNotNone(Ethernet._codec.struct)
+        self.assertIsNotNone(TCP.OptionMaxSegmentSize._codec.struct)
+        # IP has sub-byte fields, so shift-and-mask is used
+        self.assertIsNone(IP._codec.struct)
+
+    def test_field_metadata(self):
+        self.assertEqual(IP.version._byte_start, 0)
+        self.assertEqual(IP.version._byte_end, 1)
+        self.assertEqual(IP.version._first_byte_mask, 0xf0)
+        self.assertEqual(IP.ihl._first_byte_mask, 0x0f)
+        self.assertEqual(IP.fragment_offset._byte_start, 6)
+        self.assertEqual(IP.fragment_offset._byte_end, 8)
+        self.assertTrue(IP.ttl._byte_aligned)
+        self.assertFalse(IP.flags._byte_aligned)
+
+    def test_unpack(self):
+        self.assertEqual(
+            Ethernet.unpack(self.raw_byte_ethernet),
+            (bytes.fromhex("000c29ba6742"), bytes.fromhex("005056c00008"), 0x0800)
+        )
+
+        values = dict(zip(IP.solid_fields, IP.unpack(self.raw_byte_ip)))
+        self.assertEqual(values["version"], 4)
+        self.assertEqual(values["ihl"], 5)
+        self.assertEqual(values["flags"], Bits("010"))
+        self.assertEqual(values["ttl"], 128)
+        self.assertEqual(values["checksum"], 0x27df)
+        self.assertEqual(values["dst_ip"], 0xc0a88580)
+
+        frame = self.raw_byte_ethernet + self.raw_byte_ip
+        self.assertEqual(IP.unpack(memoryview(frame), 14), IP.unpack(self.raw_byte_ip))
+
+    def test_pack(self):
+        values = dict(zip(IP.solid_fields, IP.unpack(self.raw_byte_ip)))
+        self.assertEqual(IP.pack(**values), self.raw_byte_ip)
+
+        ip = IP(**values)
+        self.assertEqual(bytes(ip.solid_data), self.raw_byte_ip)
+        self.assertEqual(ip.solid_values(), IP.unpack(self.raw_byte_ip))
+
+        ethernet = Ethernet()
+        self.assertEqual(bytes(ethernet), bytes(14))
+
+    def test_pack_overflow(self):
+        # neither masked nor wrapped, in both codecs
+        for model, values in ((IP, dict(ttl=300)), (IP, dict(ttl=-1)), (Ethernet, dict(type=70000))):
+            with self.assertRaises(OverflowError):
+                model(**values)
+            with self.assertRaises(OverflowError):
+                model.pack(**values)
+        self.assertEqual(IP(ttl=255).ttl, 255)
+
+    def test_pack_bytes_size(self):
+        # neither padded nor truncated, like by the setter
+        for value in (b"\x01", bytes(7)):
+            with self.assertRaises(ValueError):
+                Ethernet(dst_mac=value)
+            with self.assertRaises(ValueError):
+                Ethernet.pack(src_mac=value)
+        self.assertEqual(Ethernet(dst_mac=b"\x01" * 6).dst_mac, b"\x01" * 6)
+        # shift-and-mask codec
+        with self.assertRaises(ValueError):
+            Reading(sensor=b"ab")
+
+
+class Celsius(IntField):
+    """stored with an offset of 40"""
+
+    def bits2py(self, bits):
+        return int(bits) - 40
+
+    def py2bits(self, value, length, instance=None, **kwargs):
+        self.instance = instance
+        return Bits.fromint(value + 40, length)
+
+
+class Reading(Model):
+    sensor = BytesField(32)
+    value = Celsius(8)
+    status = IntField(8)
+
+
+class TestStructAccess(unittest.TestCase):
+    def test_byte_aligned(self):
+        self.assertTrue(Ethernet.byte_aligned)
+        self.assertTrue(TCP.OptionSACK.byte_aligned)
+        self.assertFalse(IP.byte_aligned)
+        self.assertFalse(TCP.byte_aligned)
+        # aligned fields of other models use struct too
+        self.assertIsNotNone(IP.src_ip._struct)
+        self.assertIsNone(IP.ihl._struct)
+        # conversions of subclasses are not bypassed
+        self.assertIsNone(Reading.value._struct)
+        self.assertFalse(Reading.byte_aligned)
+
+    def test_get_set(self):
+        ethernet = Ethernet.frombytes(bytes.fromhex("000c29ba6742" "005056c00008" "0800") + b"data")
+        self.assertEqual(ethernet.dst_mac, bytes.fromhex("000c29ba6742"))
+        self.assertEqual(ethernet.type, 0x0800)
+        ethernet.type = 0x86dd
+        ethernet.src_mac = bytes.fromhex("010200000000")
+        self.assertEqual(bytes(ethernet), bytes.fromhex("000c29ba6742" "010200000000" "86dd") + b"data")
+        self.assertEqual(ethernet.solid_values(), (bytes.fromhex("000c29ba6742"), bytes.fromhex("010200000000"), 0x86dd))
+        with self.assertRaises(OverflowError):
+            ethernet.type = 0x10000
+        # not padded nor truncated
+        for value in (b"\x01\x02", bytes(7)):
+            with self.assertRaises(ValueError):
+                ethernet.src_mac = value
+        self.assertEqual(ethernet.src_mac, bytes.fromhex("010200000000"))
+        self.assertEqual(len(ethernet.solid_data), Ethernet.solid_length)
+
+        reading = Reading.frombytes(b"abcd\x3c\x01")
+        self.assertEqual((reading.sensor, reading.value, reading.status), (b"abcd", 20, 1))
+
+    def test_truncated(self):
+        ethernet = Ethernet.frombytes(bytes.fromhex("000c29ba6742" "0050"))
+        self.assertEqual(ethernet.solid_values(), (bytes.fromhex("000c29ba6742"), b"\x00\x50", 0))
+        self.assertIn("type=0", repr(ethernet))
+
+        ip = IP.frombytes(bytes.fromhex("450000344712" "4000800627df"))
+        self.assertEqual(ip.solid_values()[:2], (4, 5))
+        self.assertEqual(ip.solid_values()[-1], 0)
+
+    def test_overridden_conversions(self):
+        reading = Reading(sensor=b"abcd", value=20, status=1)
+        self.assertEqual(bytes(reading), b"abcd\x3c\x01")
+        self.assertEqual(reading.value, 20)
+        self.assertIs(Reading.value.instance, reading)
+
+        reading = Reading.frombytes(b"abcd\x3c\x01")
+        self.assertEqual(reading.solid_values(), (b"abcd", 20, 1))
+        self.assertIn("value=20", repr(reading))
+        self.assertEqual(Reading.unpack(b"abcd\x3c\x01"), (b"abcd", 20, 1))
+        self.assertEqual(Reading.pack(sensor=b"abcd", value=20, status=1), b"abcd\x3c\x01")
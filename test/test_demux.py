@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, BytesField
+from obm.datastruct import Bits
+
+
+class Inner(Model):
+    value = IntField(8)
+
+
+class Other(Model):
+    value = IntField(16)
+
+
+class Outer(Model):
+    kind = IntField(8)
+    payload_key = "kind"
+    payload_types = {1: Inner}
+
+
+class CustomOuter(Model):
+    kind = IntField(8)
+    payload_key = "kind"
+    payload_types = {1: Inner}
+
+    def payload_type(self):
+        if self.kind == 9:
+            return Other
+        return super().payload_type()
+
+
+class Text:
+    def __init__(self, bits, parent=None):
+        self.text = bytes(bits).decode()
+        self.parent = parent
+
+
+class TestDemux(unittest.TestCase):
+    def test_table(self):
+        outer = Outer.frombytes(b"\x01\x2a")
+        self.assertIsInstance(outer.payload, Inner)
+        self.assertEqual(outer.payload.value, 42)
+        self.assertIs(outer.payload_type(), Inner)
+
+        outer = Outer.frombytes(b"\x05\x2a")
+        self.assertEqual(outer.payload, Bits.frombytes(b"\x2a"))
+        self.assertIsNone(outer.payload_type())
+
+        outer = Outer.frombytes(b"\x01\x2a", lazy=True)
+        self.assertEqual(outer.payload.value, 42)
+
+    def test_register(self):
+        class Registered(Model):
+            kind = IntField(8)
+            payload_key = "kind"
+            payload_types = {}
+
+        self.assertEqual(Registered.frombytes(b"\x02hi").payload, Bits.frombytes(b"hi"))
+        Registered.register_payload(2, Text)
+        Registered.register_payload(3, Other)
+        self.assertEqual(Registered.payload_types, {2: Text, 3: Other})
+        self.assertEqual(Registered.frombytes(b"\x02hi").payload.text, "hi")
+        self.assertEqual(Registered.frombytes(b"\x03\x01\x02").payload.value, 0x0102)
+
+        # the declared dict is copied, other models are not affected
+        self.assertEqual(Outer.payload_types, {1: Inner})
+        with self.assertRaises(ValueError):
+            Inner.register_payload(1, Other)
+
+    def test_custom_payload_type(self):
+        self.assertIsInstance(CustomOuter.frombytes(b"\x09\x00\x01").payload, Other)
+        self.assertIsInstance(CustomOuter.frombytes(b"\x01\x00").payload, Inner)
+
+    def test_invalid_key(self):
+        with self.assertRaises(ValueError):
+            class Invalid(Model):
+                data = BytesField(8)
+                payload_key = "kind"
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, BytesField
+from obm.datastruct import Bits
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class Tagged(Model):
+    kind = IntField(4)
+    flag = IntField(1)
+    tag = BytesField(11)
+    payload_key = "kind"
+    payload_types = {1: IP, 2: TCP, 3: Ethernet}
+
+
+class Celsius(IntField):
+    """stored with an offset of 40"""
+
+    def bits2py(self, bits):
+        return int(bits) - 40
+
+    def py2bits(self, value, length, instance=None, **kwargs):
+        return Bits.fromint(value + 40, length)
+
+
+class Reading(Model):
+    t = Celsius(8)
+    x = IntField(8)
+
+
+def frame(protocol=6, dst_port=80, syn=0, ihl=5, type=0x0800, payload=b"data"):
+    tcp = TCP(src_port=1024, dst_port=dst_port, syn=syn, options=[], payload=Bits.frombytes(payload))
+    options = Bits.frombytes(b"\x01" * 4 * (ihl - 5))
+    ip = IP(ihl=ihl, options=options, protocol=protocol, src_ip=0x0a000001, payload=tcp)
+    return bytes(Ethernet(src_mac=b"\x00\x0c\x29\xba\x67\x4c", type=type, payload=ip))
+
+
+class TestFilters(unittest.TestCase):
+    def test_match(self):
+        match = Ethernet.compile_filter("payload.protocol == 6 and payload.payload.dst_port in {80, 443}")
+        self.assertTrue(match(frame()))
+        self.assertTrue(match(frame(dst_port=443, ihl=7)))
+        self.assertFalse(match(frame(dst_port=22)))
+        self.assertFalse(match(frame(dst_port=443, protocol=17)))
+        self.assertFalse(match(frame(type=0x0806)))
+
+        # short buffers and offsets
+        self.assertFalse(match(frame()[:36]))
+        self.assertTrue(match(frame()[:38]))
+        self.assertTrue(match(b"junk" + frame(ihl=6), 4))
+        self.assertTrue(match(memoryview(bytearray(frame(ihl=6)))))
+
+    def test_expressions(self):
+        frames = [frame(protocol=p, dst_port=d, syn=s, ihl=i)
+                  for p in (6, 17) for d in (22, 80, 443) for s in (0, 1) for i in (5, 6, 15)]
+        cases = [
+            ("type == 0x0800", lambda e: e.type == 0x0800),
+            ("not payload.payload.syn", lambda e: not (e.payload.protocol == 6 and e.payload.payload.syn)),
+            ("payload.payload.syn or payload.ihl > 5",
+             lambda e: e.payload.protocol == 6 and e.payload.payload.syn or e.payload.ihl > 5),
+            ("22 < payload.payload.dst_port <= 443 and payload.ihl != 15",
+             lambda e: e.payload.protocol == 6 and 22 < e.payload.payload.dst_port <= 443 and e.payload.ihl != 15),
+            ("payload.payload.dst_port not in (22, 80)",
+             lambda e: e.payload.protocol == 6 and e.payload.payload.dst_port not in (22, 80)),
+            ("src_mac == b'\\x00\\x0c\\x29\\xba\\x67\\x4c' and payload.src_ip == 0x0a000001", lambda e: True),
+            ("payload.payload.src_port < payload.payload.dst_port",
+             lambda e: e.payload.protocol == 6 and e.payload.payload.dst_port > 1024),
+        ]
+        for expression, expected in cases:
+            match = Ethernet.compile_filter(expression)
+            for data in frames:
+                self.assertEqual(match(data), bool(expected(Ethernet.frombytes(data))), expression)
+
+    def test_sub_byte_fields(self):
+        match = Tagged.compile_filter("flag == 1 and tag == b'\\x05\\x40'")
+        self.assertTrue(match(bytes(Tagged(kind=7, flag=1, tag=b"\x05\x40"))))
+        self.assertFalse(match(bytes(Tagged(kind=7, flag=0, tag=b"\x05\x40"))))
+
+        # the same field name reached through several payload types
+        match = Tagged.compile_filter("payload.dst_port == 80 or payload.payload.dst_port == 80")
+        tcp = TCP(dst_port=80, options=[])
+        self.assertTrue(match(bytes(Tagged(kind=2, payload=tcp))))
+        self.assertTrue(match(bytes(Tagged(kind=1, payload=IP(protocol=6, payload=tcp)))))
+        self.assertFalse(match(bytes(Tagged(kind=1, payload=IP(protocol=17, payload=tcp)))))
+        self.assertIs(match(b"\x30\x00" + frame()[:14]), False)
+
+    def test_overridden_conversions(self):
+        self.assertTrue(Reading.compile_filter("t == 20")(bytes(Reading(t=20, x=1))))
+        self.assertFalse(Reading.compile_filter("t == 60")(bytes(Reading(t=20, x=1))))
+        self.assertTrue(Reading.compile_filter("t < x")(bytes(Reading(t=-1, x=0))))
+
+    def test_errors(self):
+        for expression in ("payload", "ttl == 1", "payload.options == 0", "payload.ttl.x == 1",
+                           "type is 1", "len(type) == 1", "type ==", "payload.payload.payload.x == 1"):
+            with self.assertRaises(ValueError, msg=expression):
+                Ethernet.compile_filter(expression)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm.datastruct import Bits
+from obm.utils import one_complement_checksum
+from example.ethernet import Ethernet
+from example.tcp import TCP
+
+
+class TestIncrementalEncode(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        ) + b"helloworld"
+
+    def full_encode(self, package):
+        """encode layer by layer, without the source buffer"""
+        payload = package.payload
+        if not isinstance(payload, Bits):
+            payload = self.full_encode(payload)
+        return bytes(package.solid_data) + bytes(package.variable_data) + bytes(payload)
+
+    def test_clean(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        self.assertEqual(len(ethernet._tracked_chain()), 3)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+
+    def test_modified_fields(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        tcp = ip.payload
+        ip.ttl -= 1
+        ip.fill_checksum()
+        ip.src_ip = 0x0a000001
+        tcp.dst_port = 80
+        tcp.window_size = 1024
+        self.assertEqual(len(ethernet._tracked_chain()), 3)
+
+        raw = bytes(ethernet)
+        self.assertEqual(raw, self.full_encode(ethernet))
+        self.assertEqual(bytes(ip), raw[14:])
+        self.assertEqual(bytes(tcp), raw[34:])
+
+        decoded = Ethernet.frombytes(raw)
+        self.assertEqual(decoded.payload.ttl, 127)
+        self.assertEqual(decoded.payload.payload.dst_port, 80)
+
+    def test_variable_field(self):
+        tcp = Ethernet.frombytes(self.raw_bytes_entire_frame).payload.payload
+        options = tcp.options
+        options[0] = TCP.OptionMaxSegmentSize(value=1400)
+        tcp.options = options
+        self.assertIsNotNone(tcp._tracked_chain())
+        self.assertEqual(bytes(tcp), self.full_encode(tcp))
+        self.assertEqual(TCP.frombytes(bytes(tcp)).options[0].value, 1400)
+
+    def test_modified_data(self):
+        # header bits modified in place
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ethernet.solid_data[0:8] = Bits("11111111")
+        self.assertEqual(ethernet.dst_mac[0], 0xff)
+        self.assertEqual(bytes(ethernet)[0], 0xff)
+        self.assertEqual(bytes(ethernet), self.full_encode(ethernet))
+
+        # replaced header bits
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ethernet.solid_data = Bits.frombytes(b"\xaa" * 12 + b"\x08\x00")
+        self.assertEqual(bytes(ethernet)[:14], b"\xaa" * 12 + b"\x08\x00")
+        self.assertEqual(bytes(ethernet), self.full_encode(ethernet))
+
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        ip.solid_data = Bits(ip.solid_data)
+        ip.ttl = 1
+        self.assertEqual(bytes(ethernet)[22], 1)
+        self.assertEqual(bytes(ethernet), self.full_encode(ethernet))
+
+        # resized header bits, the payload moves
+        tcp = Ethernet.frombytes(self.raw_bytes_entire_frame).payload.payload
+        tcp.variable_data = tcp.variable_data[:32]
+        self.assertIsNone(tcp._tobytes_incremental())
+        self.assertEqual(bytes(tcp), self.full_encode(tcp))
+
+    def test_untracked(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        tcp = ethernet.payload.payload
+        tcp.payload = Bits.frombytes(b"bye")
+        self.assertIsNone(tcp._source)
+        self.assertIsNone(ethernet._tracked_chain())
+        # the TCP checksum follows the payload
+        expected = bytearray(self.raw_bytes_entire_frame[:-10] + b"bye")
+        expected[50:52] = b"\x00\x00"
+        pseudo = expected[26:34] + b"\x00\x06" + (len(expected) - 34).to_bytes(2, "big")
+        expected[50:52] = one_complement_checksum(pseudo + expected[34:]).to_bytes(2, "big")
+        self.assertEqual(bytes(ethernet), bytes(expected))
+
+        # a writable buffer may be reused by the caller, it is not tracked
+        ethernet = Ethernet.frombuffer(bytearray(self.raw_bytes_entire_frame))
+        self.assertIsNone(ethernet._source)
+
+    def test_lazy(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, lazy=True)
+        ethernet.type = 0x0800
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+        ethernet.payload.ttl = 1
+        self.assertEqual(bytes(ethernet)[22], 1)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import instrument, IntField
+from obm.fields_base import FieldBase
+from obm.model_base import PackageBase
+from example.ethernet import Ethernet
+from example.tcp import TCP
+
+FRAME = bytes.fromhex(
+    "005056c00001000c29ba674c0800"
+    "45000034471240008006" "27df" "c0a88501c0a88580"
+    "04d2" "0050" "00000001" "00000000" "6002" "ffff" "0000" "0000" "020405b4"
+)
+
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+        super().tearDown()
+
+    def test_profile(self):
+        originals = FieldBase.__dict__["__get__"], PackageBase.__dict__["_decode"], IntField.__dict__["int2py"]
+        with instrument.profile() as result:
+            for _ in range(3):
+                ethernet = Ethernet.frombytes(FRAME)
+                ethernet.payload.payload.dst_port
+                ethernet.payload.payload.options
+                ethernet.payload.ttl = 1
+                bytes(ethernet)
+        # disabled again, with the original functions
+        self.assertFalse(instrument.enabled())
+        self.assertEqual((FieldBase.__dict__["__get__"], PackageBase.__dict__["_decode"],
+                          IntField.__dict__["int2py"]), originals)
+
+        stats = result.snapshot
+        self.assertEqual(stats.models["Ethernet"].decodes, 3)
+        self.assertEqual(stats.models["Ethernet"].decode_bytes, 3 * 14)
+        self.assertEqual(stats.models["IP"].decodes, 3)
+        self.assertEqual(stats.models["TCP"].decode_bytes, 3 * 24)
+        self.assertEqual(stats.models["TCP.OptionMaxSegmentSize"].decodes, 3)
+        self.assertEqual(stats.models["Ethernet"].encodes, 3)
+        self.assertGreater(stats.models["Ethernet"].decode_time, stats.models["TCP"].decode_time)
+        self.assertEqual(stats.fields["TCP.dst_port"].gets, 3)
+        self.assertEqual(stats.fields["IP.ttl"].sets, 3)
+        self.assertEqual(stats.fields["TCP.options"].conversions, 3)
+        self.assertIn("TCP.options", stats.report())
+        self.assertEqual(stats.allocations, {})
+
+    def test_snapshot(self):
+        instrument.enable()
+        Ethernet.frombytes(FRAME)
+        before = instrument.snapshot()
+        with instrument.profile() as result:
+            TCP.frombytes(FRAME[34:])
+        # profiling leaves the counters of the process alone
+        self.assertTrue(instrument.enabled())
+        after = instrument.snapshot()
+        self.assertEqual(before.models["TCP"].decodes, 1)
+        self.assertEqual(after.models["TCP"].decodes, 2)
+        self.assertEqual(list(result.snapshot.models), ["TCP"])
+        self.assertEqual((after - before).models["TCP"].decodes, 1)
+
+        instrument.reset()
+        self.assertEqual(instrument.snapshot().models, {})
+
+    def test_allocations(self):
+        with instrument.profile(allocations=True) as result:
+            packages = [Ethernet.frombytes(FRAME) for _ in range(10)]
+        self.assertEqual(result.snapshot.models["Ethernet"].samples, 10)
+        self.assertGreater(result.snapshot.models["Ethernet"].bytes_per_decode, 0)
+        self.assertTrue(result.snapshot.allocations)
+        self.assertTrue(all(site.split(":")[0] != "instrument.py" for site in result.snapshot.allocations))
+        self.assertEqual(len(packages), 10)
+
+        with self.assertRaises(ValueError):
+            instrument.enable(allocations=True, sample_every=0)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, BitsField
+from obm.datastruct import Bits
+from obm.layout import length_dependencies
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+def helper(package):
+    return package.size * 8
+
+
+class Dynamic(Model):
+    size = IntField(8)
+    head = BitsField(lambda self: self.size * 8)
+    # calls a method, can not be cached
+    tail = BitsField(lambda self: self.tail_length())
+
+    def tail_length(self):
+        return 8 * (self.size + 1)
+
+
+class TestLengthDependencies(unittest.TestCase):
+    def test_dependencies(self):
+        solid = {"ihl", "size", "kind"}
+        self.assertEqual(length_dependencies(lambda self: max(0, (self.ihl - 5) * 32), solid), {"ihl"})
+        self.assertEqual(length_dependencies(lambda self: self.size * 8 + self.kind, solid), {"size", "kind"})
+        self.assertEqual(length_dependencies(lambda self: 64, solid), set())
+        self.assertEqual(length_dependencies(lambda self: self.size.bit_length(), solid), {"size"})
+
+        self.assertIsNone(length_dependencies(lambda self: helper(self), solid))
+        self.assertIsNone(length_dependencies(lambda self: self.payload_size(), solid))
+        self.assertIsNone(length_dependencies(lambda self: self.options, solid))
+        self.assertIsNone(length_dependencies(lambda self: sum(self.size for _ in range(2)), solid))
+        self.assertIsNone(length_dependencies(len, solid))
+
+    def test_models(self):
+        self.assertEqual(IP._layout.dependencies, {"ihl"})
+        self.assertEqual(TCP._layout.dependencies, {"data_offset"})
+        self.assertEqual(TCP.OptionSACK._layout.dependencies, {"length"})
+        self.assertIsNone(Dynamic._layout.dependencies)
+        self.assertIsNone(TCP.OptionMaxSegmentSize._layout)
+
+
+class TestLayoutCache(unittest.TestCase):
+    def test_cache(self):
+        header = bytes.fromhex("450000344712" "4000800627df" "c0a88501c0a8" "8580")
+        ip = IP.frombytes(header)
+        self.assertEqual(ip._var_layout, (0, 0))
+        self.assertIn(b"\x45", IP._layout.cache)
+
+        options = bytes.fromhex("01010101")
+        ip = IP.frombytes(b"\x46" + header[1:] + options + b"data")
+        self.assertEqual(ip._var_layout, (0, 32))
+        self.assertEqual(bytes(ip.options), options)
+        self.assertEqual(bytes(ip.payload), b"data")
+        self.assertIs(IP.frombytes(b"\x46" + header[1:] + options)._var_layout, ip._var_layout)
+
+        ip = IP(ihl=6, options=Bits.frombytes(options))
+        self.assertEqual(bytes(ip)[20:], options)
+
+    def test_uncached(self):
+        dynamic = Dynamic.frombytes(b"\x01\x80\x2a\x2b" b"rest")
+        self.assertEqual(dynamic._var_layout, (0, 8, 24))
+        self.assertEqual(bytes(dynamic.tail), b"\x2a\x2b")
+        self.assertEqual(bytes(dynamic.payload), b"rest")
+        dynamic = Dynamic(size=2)
+        self.assertEqual(dynamic._var_layout, (0, 16, 40))
+        self.assertEqual(Dynamic._layout.cache, {})
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, BytesField
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class CountingEthernet(Model):
+    dst_mac = BytesField(48)
+    src_mac = BytesField(48)
+    type = IntField(16)
+
+    payload_type_calls = 0
+
+    def payload_type(self):
+        CountingEthernet.payload_type_calls += 1
+        return IP if self.type == 0x0800 else None
+
+
+class TestLazyDecode(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        )
+        CountingEthernet.payload_type_calls = 0
+
+    def test_field_cache(self):
+        tcp = Ethernet.frombytes(self.raw_bytes_entire_frame, lazy=True).payload.payload
+        self.assertIsInstance(tcp, TCP)
+        self.assertNotIn("options", tcp._cache)
+
+        options = tcp.options
+        self.assertIs(tcp.options, options)
+        self.assertEqual(len(options), 6)
+
+        self.assertEqual(tcp.dst_port, 7777)
+        tcp.dst_port = 80
+        self.assertNotIn("dst_port", tcp._cache)
+        self.assertEqual(tcp.dst_port, 80)
+
+    def test_lazy_payload(self):
+        ethernet = CountingEthernet.frombytes(self.raw_bytes_entire_frame, lazy=True)
+        self.assertEqual(ethernet.type, 0x0800)
+        self.assertEqual(CountingEthernet.payload_type_calls, 0)
+
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+        self.assertEqual(len(ethernet), len(self.raw_bytes_entire_frame) * 8)
+        self.assertEqual(CountingEthernet.payload_type_calls, 0)
+
+        ip = ethernet.payload
+        self.assertIsInstance(ip, IP)
+        self.assertIs(ip.parent, ethernet)
+        self.assertIs(ethernet.payload, ip)
+        self.assertEqual(CountingEthernet.payload_type_calls, 1)
+
+        self.assertEqual(ip.protocol, 6)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+
+    def test_not_lazy_by_default(self):
+        ethernet = CountingEthernet.frombytes(self.raw_bytes_entire_frame)
+        self.assertEqual(CountingEthernet.payload_type_calls, 1)
+        self.assertIsNone(ethernet._cache)
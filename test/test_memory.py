@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import copy
+import gc
+import tracemalloc
+import unittest
+from obm import Model, IntField
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+def bytes_per_instance(make, count=1000):
+    """average bytes allocated by `make()`, traced with tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        instances = [make() for _ in range(count)]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(instances) == count
+    return used / count
+
+
+class DictModel:
+    """the same attributes in an instance __dict__"""
+
+    def __init__(self, layer):
+        self.__dict__.update(
+            (name, getattr(layer, name, None))
+            for cls in type(layer).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if name != "__weakref__"
+        )
+
+
+class TestCompactInstances(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        )
+
+    def test_no_instance_dict(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        for layer in (ethernet, ethernet.payload, ethernet.payload.payload):
+            self.assertFalse(hasattr(layer, "__dict__"))
+            self.assertEqual(type(layer).__dictoffset__, 0)
+        self.assertRaises(AttributeError, setattr, ethernet, "undefined_attribute", 1)
+
+    def test_custom_slots(self):
+        class Tagged(Model):
+            __slots__ = ("tag",)
+            value = IntField(8)
+
+        tagged = Tagged(value=1)
+        tagged.tag = "x"
+        self.assertEqual(tagged.tag, "x")
+        self.assertFalse(hasattr(tagged, "__dict__"))
+
+    def test_variable_layout(self):
+        tcp = Ethernet.frombytes(self.raw_bytes_entire_frame).payload.payload
+        self.assertEqual(tcp._var_layout, (0, 96))
+        self.assertEqual(tcp.variable_length, 96)
+        self.assertEqual(TCP.variable_length, 0)
+        self.assertEqual(TCP.options._var_index, 0)
+        self.assertEqual(IP().variable_length, 0)
+
+    def test_memory_per_instance(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        for layer in (ethernet, ethernet.payload, ethernet.payload.payload):
+            # both share the values, only the instances are measured
+            slotted = bytes_per_instance(lambda: copy.copy(layer))
+            with_dict = bytes_per_instance(lambda: DictModel(layer))
+            self.assertLess(slotted, with_dict * 0.8, type(layer).__name__)
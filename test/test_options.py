@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, PrefixedOptionsField
+from obm.datastruct import Bits
+from example.tcp import TCP
+
+
+class Wide(Model):
+    prefix = IntField(16, default=0xfe01)
+    value = IntField(8)
+
+
+class Narrow(Model):
+    prefix = IntField(4, default=0b1010)
+    value = IntField(4)
+
+
+class Container(Model):
+    length = IntField(8)
+    options = PrefixedOptionsField(
+        length=lambda self: self.length * 8,
+        options={
+            b"\x01": b"\x01",
+            b"\xfe\x01": Wide,
+            b"\x05": TCP.OptionSACK,
+        }
+    )
+
+
+class BitContainer(Model):
+    length = IntField(8)
+    options = PrefixedOptionsField(
+        length=lambda self: self.length,
+        options={
+            Bits("1010"): Narrow,
+            Bits("0"): Bits("0"),
+        }
+    )
+
+
+class TestPrefixedOptions(unittest.TestCase):
+    def test_dispatch_table(self):
+        self.assertIsNotNone(TCP.options._dispatch)
+        self.assertEqual(len(TCP.options._dispatch), 256)
+        entry, next_table = TCP.options._dispatch[8]
+        self.assertIs(entry[0], TCP.OptionTimestamp)
+        self.assertIsNone(next_table)
+        self.assertIsNone(BitContainer.options._dispatch)
+
+    def test_multi_byte_prefix(self):
+        raw = bytes.fromhex("0b" "01" "fe0107" "01" "050600112233")
+        c = Container.frombytes(raw)
+        options = c.options
+        self.assertEqual(len(options), 4)
+        self.assertEqual(options[0], b"\x01")
+        self.assertIsInstance(options[1], Wide)
+        self.assertEqual(options[1].value, 7)
+        self.assertIsInstance(options[3], TCP.OptionSACK)
+        self.assertEqual(options[3].value, Bits.frombytes(bytes.fromhex("00112233")))
+        self.assertEqual(bytes(c), raw)
+
+        self.assertRaises(ValueError, Container.frombytes(bytes.fromhex("02fe02")).__getattribute__, "options")
+
+    def test_bit_prefix(self):
+        c = BitContainer.frombytes(bytes.fromhex("0c" "a5" "0a"))
+        options = c.options
+        self.assertEqual(len(options), 5)
+        self.assertEqual(options[0].value, 5)
+        self.assertEqual(options[1:], [Bits("0")] * 4)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import os
+import tempfile
+import unittest
+from obm import Model, IntField, BytesField
+from obm.datastruct import Bits
+from obm.parallel import decode_file, decode_file_columns, chunk_bounds
+from example.ipv4 import IP
+
+
+class Entry(Model):
+    id = IntField(32)
+    status = IntField(8)
+    name = BytesField(24)
+
+
+def addresses(ip):
+    return ip.src_ip, ip.dst_ip, bytes(ip.options)
+
+
+def status(entry):
+    return entry.id, entry.status
+
+
+class CaptureRecord(Model):
+    magic = BytesField(32, default=b"\xa1\xb2\xc3\xd4")
+    length = IntField(16)
+
+    def payload_type(self):
+        return IP
+
+
+def capture_length(record):
+    return 6 + record.length
+
+
+def find_magic(mapping, start):
+    i = mapping.find(b"\xa1\xb2\xc3\xd4", start)
+    return i if i >= 0 else None
+
+
+def any_byte(mapping, start):
+    return start
+
+
+def payload_addresses(record):
+    return addresses(record.payload)
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+        super().tearDown()
+
+    def write(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def test_variable_records(self):
+        headers = []
+        expected = []
+        for i in range(300):
+            options = Bits.frombytes(b"\x01" * 4 * (i % 3))
+            ip = IP(ihl=5 + i % 3, src_ip=i, dst_ip=i * 7, options=options)
+            headers.append(bytes(ip))
+            expected.append((i, i * 7, bytes(options)))
+        self.write(b"HEAD" + b"".join(headers))
+
+        bounds = chunk_bounds(b"HEAD" + b"".join(headers), IP, offset=4, chunk_size=500)
+        self.assertGreater(len(bounds), 5)
+        self.assertEqual(bounds[0][0], 4)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(bounds, bounds[1:])))
+
+        for workers in (1, 2):
+            self.assertEqual(decode_file(self.path, IP, addresses, workers=workers, offset=4,
+                                         chunk_size=500), expected)
+
+        self.write(b"".join(headers)[:-3])
+        with self.assertRaises(ValueError):
+            decode_file(self.path, IP, addresses, workers=1)
+
+    def test_payload_and_sync(self):
+        records = []
+        expected = []
+        for i in range(300):
+            options = Bits.frombytes(b"\x01" * 4 * (i % 3))
+            ip = bytes(IP(ihl=5 + i % 3, src_ip=i, dst_ip=i * 7, options=options)) + b"x" * i
+            records.append(bytes(CaptureRecord(length=len(ip))) + ip)
+            expected.append((i, i * 7, bytes(options)))
+        self.write(b"HEAD" + b"".join(records))
+
+        for workers, sync in ((1, None), (2, None), (1, find_magic), (2, find_magic)):
+            self.assertEqual(decode_file(self.path, CaptureRecord, payload_addresses, workers=workers,
+                                         offset=4, chunk_size=3000, sync=sync,
+                                         record_length=capture_length), expected)
+
+        # records are checked to follow each other
+        with self.assertRaises(ValueError):
+            decode_file(self.path, CaptureRecord, payload_addresses, workers=1, offset=4, chunk_size=3000,
+                        sync=any_byte, record_length=capture_length)
+
+    def test_fixed_records(self):
+        data = b"".join(Entry.pack(id=i, status=i % 5, name=b"abc") for i in range(1000))
+        self.write(data)
+        expected = [(i, i % 5) for i in range(1000)]
+        self.assertEqual(decode_file(self.path, Entry, status, workers=2, chunk_size=800), expected)
+
+        columns = decode_file_columns(self.path, Entry, workers=2, chunk_size=800)
+        self.assertEqual(columns["id"].tolist(), list(range(1000)))
+        self.assertEqual(columns["status"].tolist(), [i % 5 for i in range(1000)])
+        self.assertEqual(columns["name"][999].tobytes(), b"abc")
+
+        with self.assertRaises(ValueError):
+            decode_file_columns(self.path, IP)
+
+    def test_empty(self):
+        self.write(b"")
+        self.assertEqual(decode_file(self.path, IP, addresses), [])
+        self.assertEqual(len(decode_file_columns(self.path, Entry)["id"]), 0)
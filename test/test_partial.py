@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm.datastruct import Bits
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class TestPartialDecode(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        ) + b"helloworld"
+
+    def test_max_depth(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, max_depth=1)
+        self.assertIsInstance(ethernet.payload, Bits)
+        self.assertEqual(bytes(ethernet.payload), self.raw_bytes_entire_frame[14:])
+
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, max_depth=2)
+        self.assertIsInstance(ethernet.payload, IP)
+        self.assertIsInstance(ethernet.payload.payload, Bits)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, max_depth=2, lazy=True)
+        self.assertIsInstance(ethernet.payload.payload, Bits)
+
+        with self.assertRaises(ValueError):
+            Ethernet.frombytes(self.raw_bytes_entire_frame, max_depth=0)
+
+    def test_stop_at(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, stop_at=IP)
+        self.assertEqual(ethernet.payload.src_ip, 0xc0a88501)
+        self.assertEqual(bytes(ethernet.payload.payload)[:2], b"\xb7\x0a")
+
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, stop_at=(TCP, IP), lazy=True)
+        self.assertIsInstance(ethernet.payload.payload, Bits)
+
+        ip = ethernet.payload
+        ip.decode_into(self.raw_bytes_entire_frame[14:])
+        self.assertIsInstance(ip.payload, TCP)
+
+    def test_fields(self):
+        fields = {"src_ip", "dst_ip", "protocol", "src_port", "dst_port"}
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, stop_at=TCP, fields=fields)
+        ip = ethernet.payload
+        tcp = ip.payload
+        self.assertEqual((ip.src_ip, ip.dst_ip, ip.protocol, tcp.src_port, tcp.dst_port),
+                         (0xc0a88501, 0xc0a88580, 6, 46858, 7777))
+        self.assertEqual(bytes(tcp.payload), b"helloworld")
+
+        # fields which are not listed can still be read, from the buffer
+        self.assertEqual(tcp.options[0].value, 1460)
+        self.assertTrue(tcp.variable_data.readonly)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+
+        tcp = TCP.frombytes(self.raw_bytes_entire_frame[34:], fields={"options"})
+        self.assertFalse(tcp.variable_data.readonly)
+
+        # copied on the first write
+        tcp = TCP.frombytes(self.raw_bytes_entire_frame[34:], fields={"dst_port"})
+        options = tcp.options
+        options[0] = TCP.OptionMaxSegmentSize(value=1400)
+        tcp.options = options
+        self.assertFalse(tcp.variable_data.readonly)
+        self.assertEqual(TCP.frombytes(bytes(tcp)).options[0].value, 1400)
+
+        # a writable buffer is never written to
+        buffer = bytearray(self.raw_bytes_entire_frame)
+        tcp = Ethernet.frombuffer(buffer, fields={"dst_port"}).payload.payload
+        tcp.options = options
+        self.assertEqual(buffer, self.raw_bytes_entire_frame)
+        self.assertEqual(tcp.options[0].value, 1400)
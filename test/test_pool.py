@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm.datastruct import Bits
+from obm.pool import Pool
+from example.ethernet import Ethernet
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class TestDecodeInto(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_bytes_entire_frame = bytes.fromhex(
+            "000c29ba6742" "005056c00008" "0800"
+            "450000344712" "4000800627df" "c0a88501c0a8" "8580"
+            "b70a1e61ee3b" "d3cb00000000" "800220002bca"
+            "0000020405b4" "010303080101" "0402"
+        ) + b"helloworld"
+
+    def other_frame(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ethernet.payload.ttl = 1
+        ethernet.payload.payload.dst_port = 80
+        ethernet.payload.payload.payload = Bits.frombytes(b"bye")
+        return bytes(ethernet)
+
+    def test_reuse_chain(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        tcp = ip.payload
+
+        raw = self.other_frame()
+        buffers = [(layer.solid_data, layer.variable_data) for layer in (ethernet, ip, tcp)]
+        self.assertIs(ethernet.decode_into(raw), ethernet)
+        # the headers are copied into the same Bits, no new ones
+        for layer, (solid, variable) in zip((ethernet, ip, tcp), buffers):
+            self.assertIs(layer.solid_data, solid)
+            self.assertIs(layer.variable_data, variable)
+        self.assertIs(ethernet.payload, ip)
+        self.assertIs(ip.payload, tcp)
+        self.assertIs(tcp.parent, ip)
+        self.assertEqual(ip.ttl, 1)
+        self.assertEqual(tcp.dst_port, 80)
+        self.assertEqual(bytes(tcp.payload), b"bye")
+        self.assertEqual(bytes(ethernet), raw)
+        self.assertEqual(repr(ethernet), repr(Ethernet.frombytes(raw)))
+
+        ethernet.decode_into(self.raw_bytes_entire_frame)
+        self.assertEqual(ip.ttl, 128)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+
+        # buffers of the caller are never written to
+        shared = bytearray(self.raw_bytes_entire_frame)
+        tcp.solid_data = Bits(buffer=memoryview(shared)[34:54])
+        ethernet.decode_into(raw)
+        self.assertEqual(shared, self.raw_bytes_entire_frame)
+        self.assertEqual(tcp.dst_port, 80)
+
+    def test_payload_type_changes(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ip = ethernet.payload
+        tcp = ip.payload
+
+        other = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        other.payload.protocol = 17
+        raw = bytes(other)
+        ip.decode_into(raw, offset=14 * 8)
+        self.assertIsInstance(ip.payload, Bits)
+        self.assertEqual(bytes(ip), raw[14:])
+
+        ip.decode_into(self.raw_bytes_entire_frame[14:])
+        self.assertIsInstance(ip.payload, TCP)
+        self.assertIsNot(ip.payload, tcp)
+
+    def test_modes(self):
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame, lazy=True)
+        ethernet.decode_into(self.other_frame(), lazy=True)
+        self.assertEqual(ethernet.payload.payload.dst_port, 80)
+
+        ethernet.decode_into(self.raw_bytes_entire_frame, drop_payload=True)
+        self.assertEqual(ethernet.payload, Bits())
+        self.assertEqual(ethernet.type, 0x0800)
+
+        # a modified package is fully re-targeted
+        ethernet = Ethernet.frombytes(self.raw_bytes_entire_frame)
+        ethernet.payload.payload.src_port = 1
+        ethernet.decode_into(self.raw_bytes_entire_frame)
+        self.assertEqual(bytes(ethernet), self.raw_bytes_entire_frame)
+
+
+class TestPool(unittest.TestCase):
+    def test_pool(self):
+        raw = bytes.fromhex("450000344712" "4000800627df" "c0a88501c0a8" "8580")
+        pool = Pool(IP, max_size=1)
+        ip = pool.decode(raw)
+        self.assertEqual(ip.src_ip, 0xc0a88501)
+        self.assertEqual(len(pool), 0)
+
+        pool.release(ip)
+        self.assertEqual(len(pool), 1)
+        self.assertIs(pool.decode(raw), ip)
+        self.assertIsNot(pool.decode(raw), ip)
+
+        pool.release(ip)
+        pool.release(IP.frombytes(raw))
+        self.assertEqual(len(pool), 1)
+
+        with self.assertRaises(ValueError):
+            pool.release(Ethernet())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import os
+import tempfile
+import unittest
+from obm import Model, IntField, BytesField
+from obm.recordfile import RecordFile
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Entry(Model):
+    id = IntField(32)
+    status = IntField(4)
+    level = IntField(4)
+    tag = BytesField(24)
+
+
+class TestRecordFile(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"HDR")
+            for i in range(100):
+                f.write(bytes(Entry(id=i, status=i % 16, level=1, tag=b"abc")))
+
+    def tearDown(self):
+        os.remove(self.path)
+        super().tearDown()
+
+    def test_read(self):
+        with RecordFile(self.path, Entry, offset=3) as records:
+            self.assertEqual(len(records), 100)
+            self.assertEqual(records[42].id, 42)
+            self.assertEqual(records[-1].id, 99)
+            self.assertEqual(records[17].status, 1)
+            self.assertEqual([r.id for r in records[10:13]], [10, 11, 12])
+            self.assertEqual(bytes(records.raw(0)), bytes(Entry(id=0, level=1, tag=b"abc")))
+            self.assertRaises(IndexError, records.__getitem__, 100)
+            self.assertRaises(TypeError, setattr, records[0], "id", 1)
+
+    def test_write_through(self):
+        with RecordFile(self.path, Entry, writable=True, offset=3) as records:
+            record = records[5]
+            record.status = 9
+            record.tag = b"xyz"
+            records[6] = Entry(id=600)
+        # still usable after closing, it keeps the mapping alive
+        self.assertEqual(record.status, 9)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        self.assertEqual(raw[3 + 5 * 8:3 + 6 * 8], bytes(Entry(id=5, status=9, level=1, tag=b"xyz")))
+        self.assertEqual(raw[3 + 6 * 8:3 + 7 * 8], bytes(Entry(id=600)))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_decode_array(self):
+        with RecordFile(self.path, Entry, offset=3) as records:
+            columns = records.decode_array()
+            self.assertEqual(columns["id"].tolist(), list(range(100)))
+        self.assertEqual(columns["status"][17], 1)
+
+    def test_close(self):
+        records = RecordFile(self.path, Entry, offset=3)
+        record = records[1]
+        with self.assertRaises(KeyError):
+            with records:
+                raise KeyError("not replaced by an error of close()")
+        self.assertEqual(record.id, 1)
+        self.assertRaises(ValueError, len, records)
+        records.close()
+
+    def test_empty(self):
+        with open(self.path, "wb"):
+            pass
+        with RecordFile(self.path, Entry) as records:
+            self.assertEqual(len(records), 0)
+            self.assertEqual(list(records), [])
+            self.assertRaises(IndexError, records.__getitem__, 0)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import io
+import unittest
+from obm import Model, IntField, BytesField
+from obm.stream import StreamDecoder
+
+
+class Message(Model):
+    kind = IntField(8)
+    length = IntField(16)
+    body = BytesField(lambda self: self.length * 8)
+
+
+class TestStreamDecode(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.bodies = [b"hello", b"", b"x" * 300, b"world!"]
+        self.raw = b"".join(
+            bytes(Message(kind=i, length=len(body), body=body))
+            for i, body in enumerate(self.bodies)
+        )
+
+    def check(self, messages):
+        self.assertEqual([m.kind for m in messages], list(range(len(self.bodies))))
+        self.assertEqual([m.body for m in messages], self.bodies)
+
+    def test_iter_buffer(self):
+        self.check(list(Message.iter_decode(self.raw)))
+        self.check(list(Message.iter_decode(memoryview(self.raw))))
+        self.assertRaises(ValueError, list, Message.iter_decode(self.raw[:-1]))
+
+    def test_iter_file(self):
+        self.check(list(Message.iter_decode(io.BytesIO(self.raw), chunk_size=7)))
+        self.assertRaises(ValueError, list, Message.iter_decode(io.BytesIO(self.raw[:-1])))
+
+    def test_feed(self):
+        decoder = StreamDecoder(Message)
+        messages = []
+        for i in range(0, len(self.raw), 3):
+            messages.extend(decoder.feed(self.raw[i:i + 3]))
+            self.assertLess(decoder.pending, 303)
+        self.check(messages)
+        self.assertEqual(decoder.pending, 0)
+        decoder.close()
+
+    def test_max_record_size(self):
+        decoder = StreamDecoder(Message, max_record_size=100)
+        self.assertRaises(ValueError, decoder.feed, self.raw)
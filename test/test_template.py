@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm.datastruct import Bits
+from example.ipv4 import IP
+from example.tcp import TCP
+
+
+class TestTemplate(unittest.TestCase):
+    def test_new(self):
+        template = IP.template(ttl=64, protocol=6, flags="010")
+        ip = template.new(src_ip=0xc0a88501, dst_ip=0xc0a88580, payload=Bits.frombytes(b"data"))
+        self.assertEqual(bytes(ip), bytes(IP(ttl=64, protocol=6, flags="010", src_ip=0xc0a88501,
+                                             dst_ip=0xc0a88580, payload=Bits.frombytes(b"data"))))
+        self.assertEqual(ip.ttl, 64)
+
+        # instances don't share their buffers
+        other = template()
+        other.ttl = 1
+        self.assertEqual(template.new().ttl, 64)
+        self.assertEqual(ip.ttl, 64)
+        self.assertEqual(ip.src_ip, 0xc0a88501)
+        self.assertEqual(other.src_ip, 0)
+
+    def test_variable_fields(self):
+        options = [TCP.OptionMaxSegmentSize(value=1460), b"\x01", b"\x01", b"\x00"]
+        template = TCP.template(dst_port=80, syn=1, data_offset=7, options=options)
+        tcp = template.new(src_port=1024)
+        self.assertEqual(bytes(tcp), bytes(TCP(dst_port=80, syn=1, data_offset=7, options=options,
+                                               src_port=1024)))
+        self.assertEqual(tcp.options[0].value, 1460)
+
+        tcp = template.new(options=[b"\x01"] * 8)
+        self.assertEqual(tcp.options, [b"\x01"] * 8)
+
+        # the layout follows solid fields which change the lengths
+        tcp = template.new(data_offset=5, options=[])
+        self.assertEqual(len(bytes(tcp)), 20)
+        tcp = template.new(data_offset=6, options=[b"\x01"] * 4)
+        self.assertEqual(len(bytes(tcp)), 24)
+        self.assertEqual(tcp.options, [b"\x01"] * 4)
+        self.assertEqual(TCP.frombytes(bytes(tcp)).options, [b"\x01"] * 4)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            IP.template().new(unknown=1)
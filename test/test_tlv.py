@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# coding=utf-8
+import unittest
+from obm import Model, IntField, TLVField
+from obm.fields_extended import TLVList
+from example.tcp import TCP
+
+
+class TCPHeaderTLV(Model):
+    data_offset = IntField(8)
+    options = TLVField(
+        length=lambda self: max(0, 32 * (self.data_offset - 5)),
+        single_types=(0, 1),
+        end_type=0,
+        types={2: TCP.OptionMaxSegmentSize, 8: TCP.OptionTimestamp},
+    )
+
+
+class Message(Model):
+    length = IntField(16)
+    items = TLVField(
+        length=lambda self: self.length * 8,
+        type_length=16,
+        length_length=16,
+        length_includes_header=False,
+    )
+
+
+class TestTLVField(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_options = bytes.fromhex(
+            "020405b4" "01" "030308" "0101" "080a00773265026b7a2b" "00000000"
+        )
+        self.raw = bytes([5 + len(self.raw_options) // 4]) + self.raw_options
+
+    def test_index(self):
+        options = TCPHeaderTLV.frombytes(self.raw).options
+        self.assertIsInstance(options, TLVList)
+        self.assertEqual(options.types(), [2, 1, 3, 1, 1, 8, 0])
+        self.assertEqual(options.raw(2), bytes.fromhex("030308"))
+        self.assertEqual(options.value(2), b"\x08")
+        self.assertEqual(options.value(1), b"")
+        self.assertEqual(options.find(3), 2)
+        self.assertEqual(options.find(5), -1)
+        self.assertEqual(bytes(options), self.raw_options)
+
+    def test_get_by_type(self):
+        options = TCPHeaderTLV.frombytes(self.raw).options
+        timestamp = options.get(8)
+        self.assertIsInstance(timestamp, TCP.OptionTimestamp)
+        self.assertEqual(timestamp.value, 0x00773265026b7a2b)
+        self.assertEqual(options.get(3), bytes.fromhex("030308"))
+        self.assertIsNone(options.get(5))
+
+    def test_splice(self):
+        header = TCPHeaderTLV.frombytes(self.raw)
+        options = header.options
+        options[0] = TCP.OptionMaxSegmentSize(value=1400)
+        options.remove(3)
+        options.insert(1, bytes.fromhex("030307"))
+        self.assertEqual(options.types(), [2, 3, 1, 1, 1, 8, 0])
+        self.assertEqual(options.get(2).value, 1400)
+        self.assertEqual(options.value(1), b"\x07")
+        header.options = options
+        self.assertEqual(
+            bytes(header)[1:],
+            bytes.fromhex("02040578" "030307" "01" "0101" "080a00773265026b7a2b" "00000000")
+        )
+        # entries are inserted one at a time
+        self.assertRaises(ValueError, options.insert, 1, b"\x01\x01")
+        self.assertRaises(ValueError, options.append, b"\x03\x03")
+
+    def test_value_only_length(self):
+        raw = bytes.fromhex("000d" "0001" "0003" "616263" "0002" "0000")
+        items = Message.frombytes(raw).items
+        self.assertEqual(items.types(), [1, 2])
+        self.assertEqual(items.value(0), b"abc")
+        self.assertEqual(items.value(1), b"")
+        self.assertRaises(ValueError, Message.frombytes(bytes.fromhex("0005" "0001" "0003" "61")).__getattribute__, "items")
+
+    def test_encode_list(self):
+        header = TCPHeaderTLV(data_offset=6, options=[TCP.OptionMaxSegmentSize(value=1460)])
+        self.assertEqual(bytes(header), bytes.fromhex("06" "020405b4"))
+
+        # no options by default
+        header = TCPHeaderTLV(data_offset=5)
+        self.assertEqual(bytes(header), b"\x05")
+        self.assertEqual(len(header.options), 0)